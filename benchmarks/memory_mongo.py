@@ -0,0 +1,124 @@
+import copy
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Equality plus the comparison operators the models use"""
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+            for op, operand in condition.items():
+                if op == "$gte" and not (value is not None and value >= operand):
+                    return False
+                if op == "$lte" and not (value is not None and value <= operand):
+                    return False
+                if op == "$lt" and not (value is not None and value < operand):
+                    return False
+                if op == "$gt" and not (value is not None and value > operand):
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _sorted(documents: List[Dict[str, Any]], sort: Optional[List[tuple]]) -> List[Dict[str, Any]]:
+    for key, direction in reversed(sort or []):
+        documents = sorted(documents, key=lambda doc: (doc.get(key) is None, doc.get(key)), reverse=direction < 0)
+    return documents
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+
+
+class InMemoryCursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+        self._sort: List[tuple] = []
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1):
+        self._sort = key if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def _results(self) -> List[Dict[str, Any]]:
+        documents = _sorted(self._documents, self._sort)
+        return documents[:self._limit] if self._limit else documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._results():
+            yield copy.deepcopy(document)
+
+    async def to_list(self, length: Optional[int] = None):
+        documents = [copy.deepcopy(document) for document in self._results()]
+        return documents[:length] if length else documents
+
+
+class InMemoryCollection:
+    """
+    Stand-in for a motor collection covering the calls the models make, so the
+    benchmark needs no MongoDB server
+    """
+
+    def __init__(self):
+        self._documents: Dict[Any, Dict[str, Any]] = {}
+
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        document.setdefault("_id", ObjectId())
+        self._documents[document["_id"]] = copy.deepcopy(document)
+        return InsertOneResult(document["_id"])
+
+    async def find_one(self, query: Dict[str, Any], sort: Optional[List[tuple]] = None):
+        matches = _sorted([doc for doc in self._documents.values() if _matches(doc, query)], sort)
+        return copy.deepcopy(matches[0]) if matches else None
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> InMemoryCursor:
+        # Projections are ignored; callers only read the fields they asked for
+        return InMemoryCursor([doc for doc in self._documents.values() if _matches(doc, query or {})])
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        document = next((doc for doc in self._documents.values() if _matches(doc, query)), None)
+        if document is None:
+            if not upsert:
+                return UpdateResult(0)
+            document = {**query, "_id": ObjectId()}
+            self._documents[document["_id"]] = document
+        document.update(copy.deepcopy(update.get("$set", {})))
+        for key, amount in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + amount
+        return UpdateResult(1)
+
+    async def delete_one(self, query: Dict[str, Any]) -> DeleteResult:
+        document = next((doc for doc in self._documents.values() if _matches(doc, query)), None)
+        if document is None:
+            return DeleteResult(0)
+        del self._documents[document["_id"]]
+        return DeleteResult(1)
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return sum(1 for doc in self._documents.values() if _matches(doc, query))
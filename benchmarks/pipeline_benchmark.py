@@ -0,0 +1,272 @@
+"""
+Offline end-to-end benchmark of the analysis pipeline.
+
+Runs POST /api/users/upload-csv -> background analysis (profiling, sampling, charts,
+crew worker pool) -> stored report, with a deterministic stub LLM and an in-memory
+stand-in for the reports collection. No network, no MongoDB, no API keys.
+
+    python -m benchmarks.pipeline_benchmark
+    python -m benchmarks.pipeline_benchmark --sizes 10000 100000 1000000 --iterations 5
+    python -m benchmarks.pipeline_benchmark --datasets sales_data_sample.csv --concurrency 2 --json out.json
+"""
+import os
+
+# Must be set before the app modules read their configuration
+os.environ.setdefault("CREW_LLM_FACTORY", "benchmarks.stub_llm:create_stub_llm")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+# Keep rendered benchmark charts out of the served charts/ directory
+os.environ.setdefault("CHARTS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "benchmarks", "charts"))
+
+import sys
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+import resource
+import threading
+import statistics
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = pathlib.Path(__file__).parent.parent
+DATA_DIR = ROOT / ".cache" / "benchmarks"
+SOURCE_DATASETS = ["sales_data_sample.csv", "support_tickets_data.csv"]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SYNTHETIC_CHUNK_ROWS = 100_000
+RSS_SAMPLE_INTERVAL = 0.05
+BENCHMARK_USER = "benchmark-user"
+
+
+def make_synthetic_csv(source: pathlib.Path, rows: int, seed: int = 0) -> pathlib.Path:
+    """
+    Scale a real CSV to `rows` rows by resampling its rows and jittering numeric columns.
+    Written in chunks so 1M-row files don't need the whole frame in memory; reused if present.
+    """
+    out_path = DATA_DIR / f"{source.stem}_{rows}.csv"
+    if out_path.exists():
+        return out_path
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    base = pd.read_csv(source, encoding_errors="replace")
+    numeric = base.select_dtypes(include="number").columns
+    rng = np.random.default_rng(seed)
+    tmp_path = out_path.with_suffix(".tmp")
+    written = 0
+    while written < rows:
+        n = min(SYNTHETIC_CHUNK_ROWS, rows - written)
+        chunk = base.sample(n=n, replace=True, random_state=int(rng.integers(1 << 31))).reset_index(drop=True)
+        for column in numeric:
+            jitter = rng.normal(1.0, 0.05, size=n)
+            values = chunk[column] * jitter
+            chunk[column] = values.round() if pd.api.types.is_integer_dtype(base[column]) else values.round(2)
+        chunk.to_csv(tmp_path, mode="a", header=written == 0, index=False)
+        written += n
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class RSSSampler:
+    """
+    Samples the RSS of this process and its children (crew workers, chart renderers)
+    in a background thread and keeps the peaks
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_server_kb = 0
+        self.peak_total_kb = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        server = _rss_kb(os.getpid())
+        total = server + sum(_rss_kb(child.pid) for child in multiprocessing.active_children())
+        self.peak_server_kb = max(self.peak_server_kb, server)
+        self.peak_total_kb = max(self.peak_total_kb, total)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+async def run_upload(client, path: pathlib.Path) -> Dict[str, Any]:
+    """Upload one file, wait for its analysis to finish and return the latency and report"""
+    from models.reportModel import Report
+    from utils.crew_jobs import subscribe
+    from utils.dump_store import dump_manager
+
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        response = await client.post(
+            "/api/users/upload-csv",
+            files={"file": (path.name, f.read(), "text/csv")},
+            data={"file_type": "csv", "force": "true"}
+        )
+    response.raise_for_status()
+    report_id = response.json()["report_id"]
+    async for _ in subscribe(report_id):
+        pass
+    report = await Report.find_by_id(report_id)
+    latency = time.perf_counter() - started
+
+    # Don't let benchmark uploads pile up in sheet_dump
+    await asyncio.to_thread(dump_manager.release, report.file_path)
+    return {"latency": latency, "report": report}
+
+
+async def benchmark_dataset(client, path: pathlib.Path, iterations: int, concurrency: int) -> Dict[str, Any]:
+    size_mb = path.stat().st_size / (1024 * 1024)
+
+    latencies, breakdowns, failures = [], [], 0
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        for _ in range(0, iterations, concurrency):
+            batch = min(concurrency, iterations - len(latencies) - failures)
+            results = await asyncio.gather(*(run_upload(client, path) for _ in range(batch)))
+            for result in results:
+                report = result["report"]
+                if report.status != "completed":
+                    failures += 1
+                    print(f"  {path.name}: report {report.id} {report.status}: {report.error_message}")
+                    continue
+                latencies.append(result["latency"])
+                breakdowns.append(report.processing_breakdown or {})
+        elapsed = time.perf_counter() - started
+
+    jobs = len(latencies)
+    profile = breakdowns and results[-1]["report"].data_profile
+    rows = profile["row_count"] if profile else 0
+    stages = {}
+    for breakdown in breakdowns:
+        for name, seconds in (breakdown.get("stages") or {}).items():
+            stages.setdefault(name, []).append(seconds)
+    return {
+        "dataset": path.name,
+        "rows": rows,
+        "size_mb": round(size_mb, 2),
+        "iterations": iterations,
+        "failures": failures,
+        "p50_seconds": round(percentile(latencies, 50), 3),
+        "p95_seconds": round(percentile(latencies, 95), 3),
+        "mean_seconds": round(statistics.mean(latencies), 3) if latencies else 0.0,
+        "throughput_jobs_per_min": round(jobs * 60 / elapsed, 2) if elapsed else 0.0,
+        "throughput_rows_per_sec": round(jobs * rows / elapsed) if elapsed else 0,
+        "throughput_mb_per_sec": round(jobs * size_mb / elapsed, 2) if elapsed else 0.0,
+        "peak_rss_server_mb": round(rss.peak_server_kb / 1024, 1),
+        "peak_rss_total_mb": round(rss.peak_total_kb / 1024, 1),
+        "mean_stage_seconds": {name: round(statistics.mean(values), 3) for name, values in stages.items()},
+    }
+
+
+async def run_benchmark(datasets: List[pathlib.Path], iterations: int, concurrency: int, warmup: bool) -> List[Dict[str, Any]]:
+    import httpx
+    import models.reportModel as report_model
+    from benchmarks.memory_mongo import InMemoryCollection
+    from middleware.authentication import is_authenticated_user
+    from main import app
+    from utils.crew_pool import crew_pool
+    from utils.chart_engine import shutdown_render_pool
+
+    report_model.reports_collection = InMemoryCollection()
+    app.dependency_overrides[is_authenticated_user] = lambda: BENCHMARK_USER
+
+    await crew_pool.start()
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            if warmup:
+                print(f"Warm-up run on {datasets[0].name}...")
+                await run_upload(client, datasets[0])
+            for path in datasets:
+                print(f"Benchmarking {path.name} ({iterations} runs, concurrency {concurrency})...")
+                results.append(await benchmark_dataset(client, path, iterations, concurrency))
+    finally:
+        await crew_pool.stop()
+        shutdown_render_pool()
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]):
+    header = f"{'dataset':<36} {'rows':>9} {'MB':>7} {'p50 s':>8} {'p95 s':>8} {'jobs/min':>9} {'rows/s':>10} {'RSS srv MB':>11} {'RSS all MB':>11}"
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['dataset']:<36} {r['rows']:>9} {r['size_mb']:>7} {r['p50_seconds']:>8} {r['p95_seconds']:>8} "
+            f"{r['throughput_jobs_per_min']:>9} {r['throughput_rows_per_sec']:>10} "
+            f"{r['peak_rss_server_mb']:>11} {r['peak_rss_total_mb']:>11}"
+        )
+    print()
+    for r in results:
+        stages = ", ".join(f"{name} {seconds}s" for name, seconds in r["mean_stage_seconds"].items())
+        print(f"{r['dataset']}: {stages}")
+    # Peak RSS of children that have exited (recycled workers), as reported by the kernel
+    children_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"\nLargest exited child process peak RSS: {children_peak:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark with a stub LLM")
+    parser.add_argument("--datasets", nargs="*", default=SOURCE_DATASETS, help="CSV files to benchmark as-is")
+    parser.add_argument("--sizes", nargs="*", type=int, default=DEFAULT_SIZES, help="Synthetic dataset row counts")
+    parser.add_argument("--synthetic-source", default=SOURCE_DATASETS[0], help="CSV the synthetic datasets are scaled from")
+    parser.add_argument("--iterations", type=int, default=3, help="Runs per dataset")
+    parser.add_argument("--concurrency", type=int, default=1, help="Uploads in flight at once")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the untimed warm-up run")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    datasets = [ROOT / name if not os.path.isabs(name) else pathlib.Path(name) for name in args.datasets]
+    for rows in args.sizes:
+        print(f"Preparing synthetic dataset with {rows} rows...")
+        datasets.append(make_synthetic_csv(ROOT / args.synthetic_source, rows))
+    missing = [str(path) for path in datasets if not path.exists()]
+    if missing:
+        print(f"Missing datasets: {', '.join(missing)}")
+        sys.exit(1)
+
+    # The app resolves config/ and sheet_dump/ relative to the repository
+    os.chdir(ROOT)
+    results = asyncio.run(run_benchmark(datasets, args.iterations, max(1, args.concurrency), not args.no_warmup))
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
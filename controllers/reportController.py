@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional, List
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any
 import time
 import json
 import csv
 import io
 from datetime import datetime
 from models.reportModel import (
-    Report, ReportCreate, ReportResponse, ReportAnalytics,
+    Report, ReportCreate, ReportUpdate, ReportResponse, ReportAnalytics, ReportStatusResponse,
     ReportHistoryRequest, ReportDeleteRequest, ReportDownloadRequest
 )
 from models.userModel import User
 from middleware.authentication import is_authenticated_user
+from utils.crew_jobs import cancel_job, is_running, subscribe
+from utils.dump_store import dump_manager
+from utils.executors import run_io
 
 router = APIRouter()
 
@@ -82,6 +86,114 @@ async def get_report_by_id(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch report: {str(e)}")
 
+@router.get("/reports/{report_id}/status", response_model=ReportStatusResponse)
+async def get_report_status(
+    report_id: str,
+    user_id: str = Depends(is_authenticated_user)
+):
+    """Poll the status of a report's analysis job"""
+    try:
+        report = await Report.find_by_id(report_id)
+        
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        
+        # Ensure user can only access their own reports
+        if report.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        return ReportStatusResponse(
+            report_id=report.id,
+            status=report.status,
+            processing_time=report.processing_time,
+            error_message=report.error_message,
+            updated_at=report.updated_at
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch report status: {str(e)}")
+
+def format_sse(event: dict) -> str:
+    """Format a job event as a Server-Sent Events message"""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+@router.get("/reports/{report_id}/events")
+async def stream_report_events(
+    report_id: str,
+    user_id: str = Depends(is_authenticated_user)
+):
+    """Stream a report's analysis progress (task events, then the final markdown) as Server-Sent Events"""
+    report = await Report.find_by_id(report_id)
+    
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    # Ensure user can only access their own reports
+    if report.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    async def event_stream():
+        if is_running(report_id):
+            async for event in subscribe(report_id):
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+                if event["type"] == "done":
+                    return
+        
+        # Job already finished (or ran on another server): send the stored outcome
+        final_report = await Report.find_by_id(report_id)
+        if not final_report:
+            yield format_sse({"type": "done", "status": "deleted", "error_message": "Report was deleted"})
+            return
+        if final_report.status == "completed":
+            yield format_sse({"type": "report", "markdown": final_report.report_content})
+        yield format_sse({
+            "type": "done",
+            "status": final_report.status,
+            "error_message": final_report.error_message,
+            "processing_time": final_report.processing_time
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/reports/{report_id}/cancel")
+async def cancel_report(
+    report_id: str,
+    user_id: str = Depends(is_authenticated_user)
+):
+    """Cancel a report's running analysis job"""
+    try:
+        report = await Report.find_by_id(report_id)
+        
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
+        
+        # Ensure user can only cancel their own reports
+        if report.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        if report.status != "processing":
+            raise HTTPException(status_code=409, detail=f"Report is already {report.status}")
+        
+        if not cancel_job(report_id) and not is_running(report_id):
+            # The job was lost (e.g. server restart); mark the report so it stops looking in flight
+            report.status = "cancelled"
+            report.error_message = "Analysis was cancelled"
+            await report.save()
+        
+        return {"message": "Report cancellation requested", "report_id": report_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to cancel report: {str(e)}")
+
 @router.delete("/reports/{report_id}")
 async def delete_report(
     report_id: str,
@@ -98,7 +210,12 @@ async def delete_report(
         if report.user_id != user_id:
             raise HTTPException(status_code=403, detail="Access denied")
         
+        # Stop any analysis still running for this report
+        cancel_job(report_id)
+        
         await report.delete()
+        # Its dataset files go too; content shared with other reports stays in the blob store
+        await run_io(dump_manager.release, report.file_path)
         
         return {"message": "Report deleted successfully"}
     except HTTPException:
@@ -206,7 +323,7 @@ def convert_markdown_to_csv(markdown_content: str) -> str:
 @router.put("/reports/{report_id}", response_model=ReportResponse)
 async def update_report(
     report_id: str,
-    report_data: ReportCreate,
+    report_data: ReportUpdate,
     user_id: str = Depends(is_authenticated_user)
 ):
     """Update a report"""
@@ -221,8 +338,12 @@ async def update_report(
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Update report fields
-        for field, value in report_data.dict().items():
+        changes = report_data.dict(exclude_unset=True)
+        for field, value in changes.items():
             setattr(report, field, value)
+        # Edited content no longer matches what the crew produced for this data
+        if "report_content" in changes:
+            report.content_hash = None
         
         await report.save()
         
@@ -241,7 +362,15 @@ async def create_report_from_analysis(
     file_name: Optional[str] = None,
     table_names: Optional[List[str]] = None,
     record_count: Optional[int] = None,
-    processing_time: Optional[float] = None
+    processing_time: Optional[float] = None,
+    status: str = "completed",
+    content_hash: Optional[str] = None,
+    cached_from: Optional[str] = None,
+    data_profile: Optional[Dict[str, Any]] = None,
+    charts: Optional[List[Dict[str, str]]] = None,
+    schema_fingerprint: Optional[str] = None,
+    data_hash: Optional[str] = None,
+    data_bytes: Optional[int] = None
 ) -> Report:
     """Helper function to create a report from analysis result"""
     # Generate title based on source type and timestamp
@@ -266,7 +395,14 @@ async def create_report_from_analysis(
         table_names=table_names,
         record_count=record_count,
         processing_time=processing_time,
-        status="completed"
+        status=status,
+        content_hash=content_hash,
+        cached_from=cached_from,
+        data_profile=data_profile,
+        charts=charts,
+        schema_fingerprint=schema_fingerprint,
+        data_hash=data_hash,
+        data_bytes=data_bytes
     )
     
     return report 
\ No newline at end of file
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from typing import List
+from models.scheduleModel import SheetSchedule, SheetScheduleCreate, SheetScheduleResponse
+from middleware.authentication import is_authenticated_user
+from utils.google_sheets import parse_sheet_url
+from utils.sheet_sync import sheet_sync, SHEET_SYNC_MIN_INTERVAL_MINUTES
+
+router = APIRouter()
+
+@router.post("/sheet-schedules")
+async def create_sheet_schedule(
+    schedule_data: SheetScheduleCreate,
+    user_id: str = Depends(is_authenticated_user)
+):
+    """Poll a Google Sheet on an interval and analyse it whenever its data changes"""
+    try:
+        parse_sheet_url(schedule_data.sheet_url)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Google Sheet URL")
+    if schedule_data.interval_minutes < SHEET_SYNC_MIN_INTERVAL_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"interval_minutes must be at least {SHEET_SYNC_MIN_INTERVAL_MINUTES:g}"
+        )
+    try:
+        schedule, created = await SheetSchedule.upsert(
+            user_id=user_id,
+            sheet_url=schedule_data.sheet_url,
+            interval_minutes=schedule_data.interval_minutes,
+            enabled=schedule_data.enabled
+        )
+        return JSONResponse(
+            status_code=201 if created else 200,
+            content=SheetScheduleResponse(**schedule.to_dict()).model_dump(mode="json")
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save schedule: {str(e)}")
+
+@router.get("/sheet-schedules", response_model=List[SheetScheduleResponse])
+async def get_sheet_schedules(user_id: str = Depends(is_authenticated_user)):
+    """Get user's sheet sync schedules"""
+    try:
+        schedules = await SheetSchedule.find_by_user_id(user_id)
+        return [SheetScheduleResponse(**schedule.to_dict()) for schedule in schedules]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch schedules: {str(e)}")
+
+@router.get("/sheet-schedules/stats")
+async def get_sheet_sync_stats(user_id: str = Depends(is_authenticated_user)):
+    """Scheduler state: running checks and their outcomes since start"""
+    return sheet_sync.stats()
+
+@router.delete("/sheet-schedules/{schedule_id}")
+async def delete_sheet_schedule(
+    schedule_id: str,
+    user_id: str = Depends(is_authenticated_user)
+):
+    """Delete a sheet sync schedule; reports it produced are kept"""
+    try:
+        schedule = await SheetSchedule.find_by_id(schedule_id)
+
+        if not schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+
+        # Ensure user can only delete their own schedules
+        if schedule.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+        await schedule.delete()
+        return {"message": "Schedule deleted successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete schedule: {str(e)}")
@@ -2,13 +2,28 @@ import warnings
 warnings.filterwarnings('ignore')
 
 import os
+import math
 import yaml
+import importlib
 import argparse
 import sys
 from crewai import Agent, Task, Crew
+from crewai.events import (
+    crewai_event_bus, TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+    LLMCallStartedEvent, LLMCallCompletedEvent, LLMCallFailedEvent, ToolUsageFinishedEvent
+)
+from crewai.tools import BaseTool
+from crewai.utilities.llm_utils import create_llm
 from crewai_tools import FileReadTool
 from IPython.display import display, Markdown
 import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.data_profiler import profile_csv, format_profile_markdown, format_delta_markdown, format_tabs_markdown
+from utils.cached_llm import with_cache
+from utils.columnar_store import iter_row_batches
+from utils.llm_usage import usage_recorder
 
 logging.basicConfig(level=logging.INFO)
 
@@ -28,89 +43,427 @@ for config_type, file_path in files.items():
 agents_config = configs['agents']
 tasks_config = configs['tasks']
 
-# FileReadTool for CSV
+# Run the three independent tasks concurrently before the final assembly
+PARALLEL_TASKS = os.getenv("CREW_PARALLEL_TASKS", "true").lower() == "true"
+
+# Let the LLM chart agent add non-standard charts on top of the pre-rendered standard ones
+LLM_EXTRA_CHARTS = os.getenv("CREW_LLM_EXTRA_CHARTS", "false").lower() == "true"
+
+# Whether agents may fall back to reading the raw CSV when the profile is not enough
+RAW_FILE_FALLBACK = os.getenv("CREW_RAW_FILE_FALLBACK", "true").lower() == "true"
+
+# Map-reduce mode for CSVs too large for the agents' context: row chunks are summarized in
+# parallel and merged before the final report. "auto" enables it above CREW_MAP_REDUCE_MIN_BYTES.
+MAP_REDUCE = os.getenv("CREW_MAP_REDUCE", "auto").lower()
+MAP_REDUCE_MIN_BYTES = int(os.getenv("CREW_MAP_REDUCE_MIN_BYTES", str(1024 * 1024)))
+CHUNK_ROWS = int(os.getenv("CREW_CHUNK_ROWS", "200"))
+CHUNK_PARALLELISM = int(os.getenv("CREW_CHUNK_PARALLELISM", "4"))
+# Larger files are covered by this many chunks spread evenly over the rows
+MAX_CHUNKS = int(os.getenv("CREW_MAX_CHUNKS", "16"))
+
+# Precomputed dataset profile exposed to the agents as a tool
+class DatasetProfileTool(BaseTool):
+    name: str = "Dataset Profile"
+    description: str = (
+        "Returns a precomputed statistical profile of the dataset: column types, null counts, "
+        "numeric summaries and quantiles, most frequent categories and strongest correlations. "
+        "Use this before reading the raw data file."
+    )
+    profile_text: str
+
+    def _run(self) -> str:
+        return self.profile_text
+
+# FileReadTool for CSV. The upload's path (a fresh UUID under sheet_dump) stays out of the
+# description the agents see, so identical datasets produce identical prompts for the LLM cache.
+CSV_TOOL_DESCRIPTION = (
+    "A tool that reads the dataset's raw CSV file. Omit 'file_path' to read it. "
+    "Specify 'start_line' and 'line_count' to read specific parts of the file."
+)
+
 def create_csv_tool(file_path):
     print("Processing file:", file_path)
-    return FileReadTool(file_path=file_path)
+    tool = FileReadTool(file_path=file_path)
+    tool.description = CSV_TOOL_DESCRIPTION
+    return tool
+
+def create_data_tools(file_path, profile=None, sample=None, delta=None, tabs=None):
+    """
+    Profile tool first; the raw file only as a fallback (or when there is no profile).
+    With a sample, the agents read the sampled file instead of the full dataset.
+    With a delta (appended upload), the raw file holds only the new rows.
+    With tabs (multi-tab sheet), the profile of every tab follows the combined one.
+    """
+    tools = []
+    if profile:
+        profile_text = format_profile_markdown(profile)
+        if tabs:
+            profile_text += "\n\n" + format_tabs_markdown(tabs)
+        if delta:
+            profile_text += "\n\n" + format_delta_markdown(delta) + (
+                "\n\nNote: the raw data file available to you contains only the appended rows."
+            )
+        if sample:
+            profile_text += (
+                f"\n\nNote: the raw data file available to you is a {sample['method']} sample of "
+                f"{sample['rows']} of {sample['source_rows'] or 'all'} rows. "
+                "Use this profile, not the sample, for totals, counts and averages."
+            )
+        tools.append(DatasetProfileTool(profile_text=profile_text))
+    if RAW_FILE_FALLBACK or not profile:
+        tools.append(create_csv_tool(sample['file_path'] if sample else file_path))
+    return tools
+
+# Optional "module:function" that builds the agents' LLM instead of the default one
+# (e.g. the deterministic stub used by benchmarks/pipeline_benchmark.py)
+LLM_FACTORY = os.getenv("CREW_LLM_FACTORY")
+
+def load_llm_factory(spec):
+    module_name, _, function_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+# Default crewai LLM (MODEL / OPENAI_MODEL_NAME) behind the response cache.
+# One instance per agent so the crew's token usage isn't counted twice.
+def create_agent_llm():
+    llm = load_llm_factory(LLM_FACTORY)() if LLM_FACTORY else create_llm(None)
+    return with_cache(llm)
 
 # Creating Agents - will be created dynamically with proper tools
-def create_suggestion_generation_agent(file_path):
-    csv_tool = create_csv_tool(file_path)
+def create_suggestion_generation_agent(tools):
     return Agent(
         config=agents_config['suggestion_generation_agent'],
-        tools=[csv_tool]
+        llm=create_agent_llm(),
+        tools=tools
     )
 
-def create_reporting_agent(file_path):
-    csv_tool = create_csv_tool(file_path)
+def create_reporting_agent(tools):
     return Agent(
         config=agents_config['reporting_agent'],
-        tools=[csv_tool]
+        llm=create_agent_llm(),
+        tools=tools
     )
 
-def create_chart_generation_agent():
+def create_chart_generation_agent(tools):
     return Agent(
         config=agents_config['chart_generation_agent'],
+        llm=create_agent_llm(),
+        tools=tools,
         allow_code_execution=False  # Disable code execution to avoid Docker dependency
     )
 
+def create_chunk_summary_agent():
+    return Agent(
+        config=agents_config['chunk_summary_agent'],
+        llm=create_agent_llm(),
+        tools=[]
+    )
+
+def create_agents(file_path, profile=None, sample=None, delta=None, tabs=None):
+    tools = create_data_tools(file_path, profile, sample, delta, tabs)
+    return {
+        'suggestion_generation_agent': create_suggestion_generation_agent(tools),
+        'reporting_agent': create_reporting_agent(tools),
+        'chart_generation_agent': create_chart_generation_agent(tools),
+        # Separate reporter instance: the reduce step runs concurrently with table generation
+        'chunk_reduce_agent': create_reporting_agent(tools)
+    }
+
+def format_chart_list(charts):
+    return "\n".join(f"- {chart['title']}: {chart['url']}" for chart in charts)
+
+def chart_generation_config(charts):
+    """Chart task config; with pre-rendered charts the agent only adds non-standard ones"""
+    config = dict(tasks_config['chart_generation'])
+    if charts:
+        config['description'] = config['description'] + (
+            "\nThese standard charts are already rendered and must not be recreated:\n"
+            + format_chart_list(charts)
+            + "\nOnly create additional charts the data needs that are not covered above."
+        )
+    return config
+
+def final_report_assembly_config(charts, delta=None, tabs=None):
+    """Assembly task config; pre-rendered charts are embedded by URL"""
+    config = dict(tasks_config['final_report_assembly'])
+    if tabs:
+        config['description'] = config['description'] + (
+            f"\nThe dataset combines these tabs of one spreadsheet: "
+            + ", ".join(f"'{tab['name']}'" for tab in tabs)
+            + ". After the overall summary, give each tab its own section with its key findings and "
+            "tables (use the per-tab profiles and the `__tab__` column), then compare the tabs where they overlap."
+        )
+    if delta:
+        config['description'] = config['description'] + (
+            f"\nThis dataset was analysed before; {delta['new_rows']} rows have been appended since. "
+            "Start the report with a 'What Changed' section based on the changes in the Dataset Profile, "
+            "then report on the dataset as a whole."
+        )
+    if charts:
+        config['description'] = config['description'] + (
+            "\nEmbed these pre-rendered charts next to the matching tables using markdown image syntax:\n"
+            + format_chart_list(charts)
+        )
+    return config
+
+def chunk_reduce_config(chunk_summaries):
+    """Reduce task config carrying the chunk summaries"""
+    config = dict(tasks_config['chunk_reduce'])
+    config['description'] = config['description'] + "\n" + "\n\n".join(
+        f"Rows {summary['row_start']} to {summary['row_end']}:\n{summary['summary']}"
+        for summary in chunk_summaries
+    )
+    return config
+
+# Map-reduce over row chunks
+def use_map_reduce(file_path):
+    if MAP_REDUCE in ('on', 'true'):
+        return True
+    if MAP_REDUCE == 'auto':
+        return os.path.getsize(file_path) > MAP_REDUCE_MIN_BYTES
+    return False
+
+def select_chunk_indices(total_chunks, limit=MAX_CHUNKS):
+    """All chunks, or `limit` chunks spread evenly from the first to the last"""
+    if total_chunks <= limit:
+        return list(range(total_chunks))
+    if limit <= 1:
+        return [0]
+    return sorted({round(i * (total_chunks - 1) / (limit - 1)) for i in range(limit)})
+
+def read_chunks(file_path, row_count=None, chunk_rows=CHUNK_ROWS):
+    """Stream the CSV once and return (row_start, DataFrame) for the selected chunks"""
+    selected = None
+    if row_count:
+        selected = set(select_chunk_indices(math.ceil(row_count / chunk_rows)))
+    chunks = []
+    for index, chunk in enumerate(iter_row_batches(file_path, chunk_rows)):
+        if selected is None and index >= MAX_CHUNKS:
+            break
+        if selected is None or index in selected:
+            chunks.append((index * chunk_rows, chunk))
+    return chunks
+
+def create_chunk_summary_task(chunk, row_start, number, count):
+    config = dict(tasks_config['chunk_summary'])
+    config['description'] = config['description'].format(
+        row_start=row_start + 1,
+        row_end=row_start + len(chunk),
+        chunk_number=number,
+        chunk_count=count,
+        chunk_csv=chunk.to_csv(index=False)
+    )
+    return Task(name=f'chunk_summary_{number}', config=config, agent=create_chunk_summary_agent())
+
+def summarize_chunks(file_path, row_count=None, parallelism=CHUNK_PARALLELISM):
+    """
+    Map step: summarize row chunks in parallel, each with its own lightweight agent.
+    Returns the chunk tasks and their summaries (failed chunks are left out).
+    """
+    chunks = read_chunks(file_path, row_count)
+    tasks = [
+        create_chunk_summary_task(chunk, row_start, number, len(chunks))
+        for number, (row_start, chunk) in enumerate(chunks, start=1)
+    ]
+
+    def summarize(task):
+        try:
+            return task.execute_sync().raw
+        except Exception as e:
+            print(f"[MAP-REDUCE] {task.name} failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as pool:
+        outputs = list(pool.map(summarize, tasks))
+
+    summaries = [
+        {'row_start': row_start + 1, 'row_end': row_start + len(chunk), 'summary': output}
+        for (row_start, chunk), output in zip(chunks, outputs) if output
+    ]
+    return tasks, summaries
+
 # Creating Tasks
-def create_tasks(file_path):
-    # Create agents with proper tools
-    suggestion_generation_agent = create_suggestion_generation_agent(file_path)
-    reporting_agent = create_reporting_agent(file_path)
-    chart_generation_agent = create_chart_generation_agent()
-    
+def create_tasks(agents, parallel=PARALLEL_TASKS, charts=None, chunk_summaries=None, delta=None, tabs=None):
+    # suggestion, table and chart generation don't depend on each other, so with
+    # async_execution the crew runs them side by side and the assembly waits for all three
     suggestion_generation = Task(
+      name='suggestion_generation',
       config=tasks_config['suggestion_generation'],
-      agent=suggestion_generation_agent,
-      context=[]
+      agent=agents['suggestion_generation_agent'],
+      context=[],
+      async_execution=parallel
     )
 
     table_generation = Task(
+      name='table_generation',
       config=tasks_config['table_generation'],
-      agent=reporting_agent,
-      context=[]
+      agent=agents['reporting_agent'],
+      context=[],
+      async_execution=parallel
     )
 
-    chart_generation = Task(
-      config=tasks_config['chart_generation'],
-      agent=chart_generation_agent,
-      context=[]
-    )
+    independent_tasks = [suggestion_generation, table_generation]
+
+    # The LLM chart agent is only needed when the chart engine produced nothing,
+    # or when it is allowed to add non-standard charts
+    if not charts or LLM_EXTRA_CHARTS:
+        chart_generation = Task(
+          name='chart_generation',
+          config=chart_generation_config(charts),
+          agent=agents['chart_generation_agent'],
+          context=[],
+          async_execution=parallel
+        )
+        independent_tasks.append(chart_generation)
+
+    # Map-reduce mode: merge the chunk summaries alongside the other independent tasks
+    if chunk_summaries:
+        chunk_reduce = Task(
+          name='chunk_reduce',
+          config=chunk_reduce_config(chunk_summaries),
+          agent=agents['chunk_reduce_agent'],
+          context=[],
+          async_execution=parallel
+        )
+        independent_tasks.append(chunk_reduce)
 
     final_report_assembly = Task(
-      config=tasks_config['final_report_assembly'],
-      agent=reporting_agent,
-      context=[suggestion_generation, table_generation, chart_generation]
+      name='final_report_assembly',
+      config=final_report_assembly_config(charts, delta, tabs),
+      agent=agents['reporting_agent'],
+      context=list(independent_tasks)
     )
     
-    return [suggestion_generation, table_generation, chart_generation, final_report_assembly]
+    return independent_tasks + [final_report_assembly]
 
 # Creating Crew
-def create_crew(file_path):
-    tasks = create_tasks(file_path)
+def create_crew(file_path, profile=None, charts=None, sample=None, chunk_summaries=None, delta=None, tabs=None):
+    agents = create_agents(file_path, profile, sample, delta, tabs)
+    tasks = create_tasks(agents, charts=charts, chunk_summaries=chunk_summaries, delta=delta, tabs=tabs)
     
-    # Create agents with proper tools
-    suggestion_generation_agent = create_suggestion_generation_agent(file_path)
-    reporting_agent = create_reporting_agent(file_path)
-    chart_generation_agent = create_chart_generation_agent()
+    # Only the agents that have a task in this run
+    crew_agents = [agent for agent in agents.values() if any(task.agent is agent for task in tasks)]
     
     report_crew = Crew(
-      agents=[
-        suggestion_generation_agent,
-        reporting_agent,
-        chart_generation_agent
-      ],
+      agents=crew_agents,
       tasks=tasks,
       verbose=True
     )
     
     return report_crew
 
-def kickoff_crew(file_path):
-    crew = create_crew(file_path)
-    return crew.kickoff()
+# Receives task progress events for the job currently running in this process
+_event_sink = None
+
+def _emit(event):
+    if _event_sink is not None:
+        _event_sink(event)
+
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    _emit({'type': 'task_started', 'task': event.task_name})
+
+@crewai_event_bus.on(TaskCompletedEvent)
+def _on_task_completed(source, event):
+    _emit({
+        'type': 'task_finished',
+        'task': event.task_name,
+        'output': event.output.raw if event.output else None
+    })
+
+@crewai_event_bus.on(TaskFailedEvent)
+def _on_task_failed(source, event):
+    _emit({'type': 'task_failed', 'task': event.task_name, 'error': event.error})
+
+# LLM and tool usage per task, summarised into the job metrics
+@crewai_event_bus.on(LLMCallStartedEvent)
+def _on_llm_started(source, event):
+    usage_recorder.llm_started(event.call_id, event.timestamp)
+
+@crewai_event_bus.on(LLMCallCompletedEvent)
+def _on_llm_completed(source, event):
+    usage_recorder.llm_completed(event.task_name, event.model, event.call_id, event.timestamp, event.usage)
+
+@crewai_event_bus.on(LLMCallFailedEvent)
+def _on_llm_failed(source, event):
+    usage_recorder.llm_failed(event.task_name, event.call_id)
+
+@crewai_event_bus.on(ToolUsageFinishedEvent)
+def _on_tool_finished(source, event):
+    usage_recorder.tool_finished(
+        event.task_name,
+        event.tool_name,
+        (event.finished_at - event.started_at).total_seconds()
+    )
+
+def collect_task_timings(tasks, started_at):
+    """Per-task start offsets and durations (seconds) relative to the start of the job"""
+    timings = {}
+    for task in tasks:
+        if not task.start_time or not task.end_time:
+            continue
+        timings[task.name] = {
+            'start_offset': round((task.start_time - started_at).total_seconds(), 3),
+            'duration': round((task.end_time - task.start_time).total_seconds(), 3)
+        }
+    return timings
+
+def run_crew_job(file_path, profile=None, charts=None, sample=None, delta=None, tabs=None, on_event=None):
+    """
+    Run the crew and return the report markdown together with timing and usage metrics.
+    `on_event` receives task start/finish events (with each task's output) as they happen.
+    Large files are summarized chunk by chunk first (map-reduce mode).
+    `tabs` ([{name, gid, rows, profile}]) asks for a section per tab of a multi-tab sheet.
+    """
+    global _event_sink
+    usage_recorder.reset()
+    _event_sink = on_event
+    chunk_tasks, chunk_summaries, map_reduce = [], None, None
+    started_at = datetime.now()
+    try:
+        if use_map_reduce(file_path):
+            # With a delta the file holds only the appended rows
+            row_count = delta['new_rows'] if delta else (profile or {}).get('row_count')
+            chunk_tasks, chunk_summaries = summarize_chunks(file_path, row_count)
+            map_reduce = {
+                'chunk_rows': CHUNK_ROWS,
+                'parallelism': CHUNK_PARALLELISM,
+                'chunks': len(chunk_tasks),
+                'chunks_summarized': len(chunk_summaries),
+                'rows_covered': sum(s['row_end'] - s['row_start'] + 1 for s in chunk_summaries),
+                'map_wall_clock': round((datetime.now() - started_at).total_seconds(), 3)
+            }
+        setup_started_at = datetime.now()
+        crew = create_crew(file_path, profile, charts, sample, chunk_summaries, delta, tabs)
+        kickoff_at = datetime.now()
+        _emit({'type': 'crew_started', 'tasks': [task.name for task in crew.tasks]})
+        result = crew.kickoff()
+    finally:
+        # Event handlers run on the bus's thread pool; deliver them before detaching the sink
+        crewai_event_bus.flush()
+        _event_sink = None
+    crew_setup = (kickoff_at - setup_started_at).total_seconds()
+    wall_clock = (datetime.now() - started_at).total_seconds() - crew_setup
+
+    task_timings = collect_task_timings(chunk_tasks + crew.tasks, started_at)
+    usage = usage_recorder.summary()
+    for name, task_usage in usage['tasks'].items():
+        task_timings.setdefault(name, {}).update(task_usage)
+    metrics = {
+        'parallel_tasks': PARALLEL_TASKS,
+        'crew_setup': round(crew_setup, 3),
+        'crew_wall_clock': round(wall_clock, 3),
+        'task_time_total': round(sum(t.get('duration', 0) for t in task_timings.values()), 3),
+        'tasks': task_timings,
+        'totals': usage['totals'],
+        'models': usage['models'],
+        'map_reduce': map_reduce
+    }
+    totals = usage['totals']
+    print(
+        f"Crew finished in {wall_clock:.1f}s (sum of task times {metrics['task_time_total']:.1f}s, "
+        f"{totals['llm_calls']} LLM calls, {totals['total_tokens']} tokens, ${totals['cost_usd']:.4f})"
+    )
+    return {'report': result.raw, 'metrics': metrics}
 
 def main():
     parser = argparse.ArgumentParser(description='Process CSV file with CrewAI')
@@ -123,13 +476,15 @@ def main():
         sys.exit(1)
     
     print("Running Crew...")
-    result = kickoff_crew(args.file_path)
+    profile = profile_csv(args.file_path)
+    result = run_crew_job(args.file_path, profile)
     print("Crew has been kicked off successfully.")
-    print("Result:", result.raw)
+    print("Task timings:", result['metrics']['tasks'])
+    print("Result:", result['report'])
     
     # Save the result as a markdown file
     with open("final_report_3.md", "w", encoding="utf-8") as f:
-        f.write(result.raw)
+        f.write(result['report'])
     print("Final report has been saved as 'final_report_3.md'")
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 import uvicorn
 from dotenv import load_dotenv
 import os
@@ -13,6 +14,14 @@ from middleware.authentication import verify_token
 from middleware.error import error_handler
 from routes.userRoutes import user_router
 from controllers.reportController import router as report_router
+from controllers.scheduleController import router as schedule_router
+from utils.crew_pool import crew_pool
+from utils.chart_engine import CHARTS_DIR, shutdown_render_pool
+from utils.dump_store import dump_manager
+from utils.executors import shutdown_executors
+from utils.google_sheets import close_http_client
+from utils.sheet_sync import sheet_sync
+from utils.postgres_utils import dispose_postgres_engines
 
 # Load environment variables
 load_dotenv()
@@ -42,6 +51,48 @@ security = HTTPBearer()
 # Include routers
 app.include_router(user_router, prefix="/api/users", tags=["users"])
 app.include_router(report_router, prefix="/api/users", tags=["reports"])
+app.include_router(schedule_router, prefix="/api/users", tags=["schedules"])
+
+# Pre-warm the crew worker pool so the first upload doesn't pay the import cost
+@app.on_event("startup")
+async def start_crew_pool():
+    await crew_pool.start()
+
+@app.on_event("shutdown")
+async def stop_crew_pool():
+    await crew_pool.stop()
+    shutdown_render_pool()
+    shutdown_executors()
+
+# Periodically evict stale datasets from sheet_dump
+@app.on_event("startup")
+async def start_dump_sweeper():
+    dump_manager.start()
+
+@app.on_event("shutdown")
+async def stop_dump_sweeper():
+    await dump_manager.stop()
+
+# Poll scheduled Google Sheets and analyse the ones that changed
+@app.on_event("startup")
+async def start_sheet_sync():
+    sheet_sync.start()
+
+@app.on_event("shutdown")
+async def stop_sheet_sync():
+    await sheet_sync.stop()
+
+@app.on_event("shutdown")
+async def close_sheets_client():
+    await close_http_client()
+
+@app.on_event("shutdown")
+async def close_postgres_pools():
+    dispose_postgres_engines()
+
+# Serve rendered charts so reports can embed them by URL
+CHARTS_DIR.mkdir(parents=True, exist_ok=True)
+app.mount("/charts", StaticFiles(directory=CHARTS_DIR), name="charts")
 
 # Root endpoint
 @app.get("/")
@@ -23,24 +23,37 @@ class ReportBase(BaseModel):
     report_content: str = Field(..., description="Markdown content of the report")
     file_path: Optional[str] = Field(None, description="Path to the original file")
     file_name: Optional[str] = Field(None, description="Original file name")
-    table_names: Optional[List[str]] = Field(None, description="Names of tables analyzed (for PostgreSQL)")
+    table_names: Optional[List[str]] = Field(None, description="Names of tables (PostgreSQL) or sheet tabs analyzed")
     record_count: Optional[int] = Field(None, description="Number of records analyzed")
     processing_time: Optional[float] = Field(None, description="Time taken to process in seconds")
-    status: str = Field(default="completed", description="Report status: completed, failed, processing")
+    status: str = Field(default="completed", description="Report status: completed, failed, processing, cancelled")
+    error_message: Optional[str] = Field(None, description="Error details if the analysis failed")
+    content_hash: Optional[str] = Field(None, description="Hash of the dataset bytes and crew configuration")
+    cached_from: Optional[str] = Field(None, description="ID of the report this one was reused from")
+    data_profile: Optional[Dict[str, Any]] = Field(None, description="Statistical profile of the analysed dataset")
+    processing_breakdown: Optional[Dict[str, Any]] = Field(None, description="Stage and per-task timings, LLM calls, token counts, cost and tool times")
+    charts: Optional[List[Dict[str, str]]] = Field(None, description="Pre-rendered standard charts (title, kind, url)")
+    schema_fingerprint: Optional[str] = Field(None, description="Hash of the dataset's header row")
+    data_hash: Optional[str] = Field(None, description="Hash of the dataset bytes alone")
+    data_bytes: Optional[int] = Field(None, description="Size of the dataset in bytes")
+    incremental: Optional[Dict[str, Any]] = Field(None, description="Base report and what changed, for appended datasets")
 
     class Config:
         validate_by_name = True
 
-class ReportCreate(ReportBase):
-    """Model for creating a new report"""
-    pass
+class ReportCreate(BaseModel):
+    """Model for creating a new report; file, status and cache fields are set by the server only"""
+    source_type: str = Field(..., description="Source type: csv, postgres, google_sheet")
+    report_title: str = Field(..., description="Title of the report")
+    report_content: str = Field(..., description="Markdown content of the report")
+    file_name: Optional[str] = Field(None, description="Original file name")
+    table_names: Optional[List[str]] = Field(None, description="Names of tables (PostgreSQL) or sheet tabs analyzed")
+    record_count: Optional[int] = Field(None, description="Number of records analyzed")
 
 class ReportUpdate(BaseModel):
     """Model for updating report information"""
     report_title: Optional[str] = None
     report_content: Optional[str] = None
-    status: Optional[str] = None
-    processing_time: Optional[float] = None
 
 class ReportResponse(BaseModel):
     """Model for report response"""
@@ -55,17 +68,32 @@ class ReportResponse(BaseModel):
     record_count: Optional[int]
     processing_time: Optional[float]
     status: str
+    error_message: Optional[str] = None
+    cached_from: Optional[str] = None
+    data_profile: Optional[Dict[str, Any]] = None
+    processing_breakdown: Optional[Dict[str, Any]] = None
+    charts: Optional[List[Dict[str, str]]] = None
+    incremental: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class ReportStatusResponse(BaseModel):
+    """Model for analysis job status response"""
+    report_id: str
+    status: str
+    processing_time: Optional[float]
+    error_message: Optional[str]
+    updated_at: datetime
+
 class ReportAnalytics(BaseModel):
     """Model for report analytics"""
     total_reports: int
     reports_by_source: Dict[str, int]
     average_processing_time: float
+    average_breakdown: Dict[str, Any] = {}
     most_used_source: str
     recent_reports: List[ReportResponse]
 
@@ -87,6 +115,16 @@ class Report:
         self.record_count = kwargs.get('record_count')
         self.processing_time = kwargs.get('processing_time')
         self.status = kwargs.get('status', 'completed')
+        self.error_message = kwargs.get('error_message')
+        self.content_hash = kwargs.get('content_hash')
+        self.cached_from = kwargs.get('cached_from')
+        self.data_profile = kwargs.get('data_profile')
+        self.processing_breakdown = kwargs.get('processing_breakdown')
+        self.charts = kwargs.get('charts')
+        self.schema_fingerprint = kwargs.get('schema_fingerprint')
+        self.data_hash = kwargs.get('data_hash')
+        self.data_bytes = kwargs.get('data_bytes')
+        self.incremental = kwargs.get('incremental')
         self.created_at = kwargs.get('created_at', datetime.utcnow())
         self.updated_at = kwargs.get('updated_at', datetime.utcnow())
     
@@ -117,6 +155,16 @@ class Report:
             "record_count": report.record_count,
             "processing_time": report.processing_time,
             "status": report.status,
+            "error_message": report.error_message,
+            "content_hash": report.content_hash,
+            "cached_from": report.cached_from,
+            "data_profile": report.data_profile,
+            "processing_breakdown": report.processing_breakdown,
+            "charts": report.charts,
+            "schema_fingerprint": report.schema_fingerprint,
+            "data_hash": report.data_hash,
+            "data_bytes": report.data_bytes,
+            "incremental": report.incremental,
             "created_at": report.created_at,
             "updated_at": report.updated_at
         }
@@ -148,6 +196,57 @@ class Report:
             return cls(**report_data)
         return None
     
+    @classmethod
+    async def find_by_content_hash(cls, content_hash: str, user_id: str, since: datetime):
+        """
+        Find a user's latest completed report for a content hash created after `since`.
+        Only crew-written originals match: copies served from the cache are skipped, so
+        reuse never renews the TTL.
+        """
+        report_data = await reports_collection.find_one(
+            {
+                "content_hash": content_hash,
+                "user_id": user_id,
+                "status": "completed",
+                "cached_from": None,
+                "created_at": {"$gte": since}
+            },
+            sort=[("created_at", -1)]
+        )
+        if report_data:
+            return cls(**report_data)
+        return None
+    
+    @classmethod
+    async def find_append_candidates(cls, user_id: str, schema_fingerprint: str, max_bytes: int, limit: int = 5):
+        """Latest completed reports of a user on a dataset with the same header and fewer bytes"""
+        query = {
+            "user_id": user_id,
+            "schema_fingerprint": schema_fingerprint,
+            "status": "completed",
+            "data_bytes": {"$lt": max_bytes}
+        }
+        reports = []
+        cursor = reports_collection.find(query).sort("created_at", -1).limit(limit)
+        async for report_data in cursor:
+            reports.append(cls(**report_data))
+        return reports
+    
+    @classmethod
+    async def find_file_path_usage(cls, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Status and last update of the reports referencing the given files, keyed by file path"""
+        usage = {}
+        cursor = reports_collection.find(
+            {"file_path": {"$in": file_paths}},
+            {"file_path": 1, "status": 1, "updated_at": 1}
+        )
+        async for report_data in cursor:
+            current = usage.get(report_data["file_path"])
+            # A file still being analysed by any report must be kept
+            if current is None or report_data.get("status") == "processing":
+                usage[report_data["file_path"]] = report_data
+        return usage
+
     @classmethod
     async def get_analytics(cls, user_id: str):
         """Get analytics for a user's reports"""
@@ -180,6 +279,9 @@ class Report:
                 processing_count += 1
         
         average_processing_time = total_processing_time / processing_count if processing_count > 0 else 0
+        average_breakdown = cls._average_breakdown(
+            [report.processing_breakdown for report in reports if report.processing_breakdown]
+        )
         
         # Find most used source
         most_used_source = max(reports_by_source.items(), key=lambda x: x[1])[0] if reports_by_source else ""
@@ -191,16 +293,48 @@ class Report:
             total_reports=total_reports,
             reports_by_source=reports_by_source,
             average_processing_time=average_processing_time,
+            average_breakdown=average_breakdown,
             most_used_source=most_used_source,
             recent_reports=recent_reports
         )
     
+    @staticmethod
+    def _average_breakdown(breakdowns: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Average stage times, crew totals (tokens, cost, LLM/tool time) and task durations"""
+        def average(values):
+            values = [value for value in values if isinstance(value, (int, float))]
+            return round(sum(values) / len(values), 6) if values else None
+        
+        stage_names = {name for b in breakdowns for name in (b.get("stages") or {})}
+        total_keys = {key for b in breakdowns for key in (b.get("totals") or {}) if key != "cost_complete"}
+        task_names = {name for b in breakdowns for name in (b.get("tasks") or {})}
+        return {
+            "reports": len(breakdowns),
+            "crew_wall_clock": average(b.get("crew_wall_clock") for b in breakdowns),
+            "stages": {
+                name: average((b.get("stages") or {}).get(name) for b in breakdowns)
+                for name in sorted(stage_names)
+            },
+            "totals": {
+                key: average((b.get("totals") or {}).get(key) for b in breakdowns)
+                for key in sorted(total_keys)
+            },
+            "tasks": {
+                name: {
+                    key: average(((b.get("tasks") or {}).get(name) or {}).get(key) for b in breakdowns)
+                    for key in ("duration", "llm_calls", "prompt_tokens", "completion_tokens", "cost_usd", "tool_time")
+                }
+                for name in sorted(task_names)
+            },
+        }
+    
     async def save(self):
         """Save report to database"""
         self.updated_at = datetime.utcnow()
         
         # Convert to dict and remove _id for update
         report_dict = self.to_dict()
+        report_dict['created_at'] = self.created_at
         report_dict['updated_at'] = self.updated_at
         
         # Update in MongoDB
@@ -229,6 +363,16 @@ class Report:
             "record_count": self.record_count,
             "processing_time": self.processing_time,
             "status": self.status,
+            "error_message": self.error_message,
+            "content_hash": self.content_hash,
+            "cached_from": self.cached_from,
+            "data_profile": self.data_profile,
+            "processing_breakdown": self.processing_breakdown,
+            "charts": self.charts,
+            "schema_fingerprint": self.schema_fingerprint,
+            "data_hash": self.data_hash,
+            "data_bytes": self.data_bytes,
+            "incremental": self.incremental,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,169 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+import uuid
+
+from models.reportModel import db
+
+# Scheduled Google Sheet syncs live next to the reports they produce
+sheet_schedules_collection = db.sheet_schedules
+
+class SheetScheduleCreate(BaseModel):
+    """Model for creating or updating a sheet sync schedule"""
+    sheet_url: str = Field(..., description="Google Sheets URL to poll")
+    interval_minutes: float = Field(60, description="Minutes between checks")
+    enabled: bool = Field(True, description="Whether the schedule is polled")
+
+class SheetScheduleResponse(BaseModel):
+    """Model for sheet schedule response"""
+    id: str
+    user_id: str
+    sheet_url: str
+    interval_minutes: float
+    enabled: bool
+    next_run_at: Optional[datetime] = None
+    last_checked_at: Optional[datetime] = None
+    last_changed_at: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    last_report_id: Optional[str] = None
+    consecutive_failures: int = 0
+    checks: int = 0
+    analyses: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class SheetSchedule:
+    """
+    Periodic sync of one Google Sheet for one user (unique per user and sheet_url).
+    The sheet is re-fetched every interval and analysed only when its data hash changed.
+    """
+
+    def __init__(self, **kwargs):
+        self._id = kwargs.get('_id')
+        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.user_id = kwargs.get('user_id')
+        self.sheet_url = kwargs.get('sheet_url')
+        self.interval_minutes = kwargs.get('interval_minutes', 60)
+        self.enabled = kwargs.get('enabled', True)
+        self.next_run_at = kwargs.get('next_run_at')
+        self.last_checked_at = kwargs.get('last_checked_at')
+        self.last_changed_at = kwargs.get('last_changed_at')
+        self.last_status = kwargs.get('last_status')
+        self.last_error = kwargs.get('last_error')
+        self.last_data_hash = kwargs.get('last_data_hash')
+        self.last_report_id = kwargs.get('last_report_id')
+        self.consecutive_failures = kwargs.get('consecutive_failures', 0)
+        self.checks = kwargs.get('checks', 0)
+        self.analyses = kwargs.get('analyses', 0)
+        self.created_at = kwargs.get('created_at', datetime.utcnow())
+        self.updated_at = kwargs.get('updated_at', datetime.utcnow())
+
+    @classmethod
+    async def upsert(cls, user_id: str, sheet_url: str, interval_minutes: float, enabled: bool = True):
+        """Create the schedule of a user's sheet, or update its interval; the first check is due now"""
+        existing = await cls.find_by_sheet_url(user_id, sheet_url)
+        now = datetime.utcnow()
+        if existing:
+            await existing.update(interval_minutes=interval_minutes, enabled=enabled, next_run_at=now)
+            return existing, False
+
+        schedule = cls(
+            user_id=user_id,
+            sheet_url=sheet_url,
+            interval_minutes=interval_minutes,
+            enabled=enabled,
+            next_run_at=now,
+            created_at=now,
+            updated_at=now
+        )
+        result = await sheet_schedules_collection.insert_one(schedule.to_document())
+        schedule._id = result.inserted_id
+        return schedule, True
+
+    @classmethod
+    async def find_by_id(cls, schedule_id: str):
+        """Find a schedule by ID"""
+        data = await sheet_schedules_collection.find_one({"id": schedule_id})
+        return cls(**data) if data else None
+
+    @classmethod
+    async def find_by_sheet_url(cls, user_id: str, sheet_url: str):
+        data = await sheet_schedules_collection.find_one({"user_id": user_id, "sheet_url": sheet_url})
+        return cls(**data) if data else None
+
+    @classmethod
+    async def find_by_user_id(cls, user_id: str, limit: int = 100):
+        """Find a user's schedules, newest first"""
+        schedules = []
+        cursor = sheet_schedules_collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+        async for data in cursor:
+            schedules.append(cls(**data))
+        return schedules
+
+    @classmethod
+    async def find_due(cls, now: datetime, limit: int, exclude: Optional[List[str]] = None):
+        """Enabled schedules whose next check is due, most overdue first"""
+        query = {"enabled": True, "next_run_at": {"$lte": now}}
+        schedules = []
+        cursor = sheet_schedules_collection.find(query).sort("next_run_at", 1).limit(limit + len(exclude or []))
+        async for data in cursor:
+            if data["id"] not in (exclude or []):
+                schedules.append(cls(**data))
+        return schedules[:limit]
+
+    async def claim(self, lease_until: datetime) -> bool:
+        """
+        Take the schedule for one check by moving its next run to `lease_until`; only one
+        of several API instances succeeds. A check that dies is retried when the lease ends.
+        """
+        result = await sheet_schedules_collection.update_one(
+            {"id": self.id, "next_run_at": self.next_run_at},
+            {"$set": {"next_run_at": lease_until, "updated_at": datetime.utcnow()}}
+        )
+        if result.matched_count:
+            self.next_run_at = lease_until
+        return bool(result.matched_count)
+
+    async def update(self, **kwargs):
+        """Update schedule fields"""
+        kwargs['updated_at'] = datetime.utcnow()
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        await sheet_schedules_collection.update_one({"id": self.id}, {"$set": kwargs})
+        return self
+
+    async def delete(self):
+        """Delete schedule from database"""
+        await sheet_schedules_collection.delete_one({"id": self.id})
+        return True
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "sheet_url": self.sheet_url,
+            "interval_minutes": self.interval_minutes,
+            "enabled": self.enabled,
+            "next_run_at": self.next_run_at,
+            "last_checked_at": self.last_checked_at,
+            "last_changed_at": self.last_changed_at,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_data_hash": self.last_data_hash,
+            "last_report_id": self.last_report_id,
+            "consecutive_failures": self.consecutive_failures,
+            "checks": self.checks,
+            "analyses": self.analyses,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert schedule to dictionary for JSON response"""
+        data = self.to_document()
+        data.pop("last_data_hash")
+        return data
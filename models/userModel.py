@@ -10,6 +10,8 @@ from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 
+from utils.executors import run_cpu
+
 load_dotenv()
 
 # MongoDB connection
@@ -88,7 +90,7 @@ class User:
         
         # Hash password
         if 'password' in kwargs:
-            kwargs['password'] = cls._hash_password(kwargs['password'])
+            kwargs['password'] = await run_cpu(cls._hash_password, kwargs['password'])
         
         # Set timestamps
         kwargs['created_at'] = datetime.utcnow()
@@ -167,7 +169,8 @@ class User:
     
     async def compare_password(self, entered_password: str) -> bool:
         """Compare entered password with stored password"""
-        return bcrypt.checkpw(
+        return await run_cpu(
+            bcrypt.checkpw,
             entered_password.encode('utf-8'),
             self.password.encode('utf-8')
         )
@@ -1,17 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body
 from fastapi.responses import JSONResponse
-from typing import Optional
-import subprocess
+from typing import Optional, Callable, List, Literal, Union
 import os
+import asyncio
+import time
 from tempfile import NamedTemporaryFile
 from pydantic import BaseModel
 
 from controllers.userController import UserController
 from middleware.authentication import is_authenticated_user
-from utils.s3upload import upload_csv_to_local
+from utils.s3upload import stream_upload_to_local, backup_upload_to_s3
+from utils.crew_pool import crew_pool, CrewWorkerError
+from utils.crew_jobs import (
+    start_job, publish_event, threadsafe_event_publisher,
+    check_admission, release_admission, admission_stats, JobQueueFull
+)
+from utils.report_cache import find_cached_report
+from utils.incremental import fingerprint_upload, write_appended_rows, remove_appended_rows
+from utils.data_profiler import profile_csv, profile_dataframe, merge_profiles, profile_delta
+from utils.chart_engine import build_chart_specs_from_csv, render_charts
+from utils.sampling import create_llm_sample
+from utils.columnar_store import ensure_parquet, write_parquet_from_frame
+from utils.llm_cache import get_llm_cache
+from utils.dump_store import dump_manager
+from utils.executors import run_io, run_cpu, executor_stats
+from utils.frame_loader import read_csv_compact, concat_frames, combine_memory_reports
+from utils.google_sheets import (
+    parse_sheet_url, fetch_sheet, fetch_sheet_tabs, list_sheet_tabs, SheetFetchError, SHEETS_MAX_TABS
+)
 # Remove this import as we're implementing the logic directly in the endpoint
 from models.userModel import UserCreate, LoginRequest, ForgotPasswordRequest, ResetPasswordRequest, UpdatePasswordRequest, ResendEmailRequest, UserUpdate
-from utils.postgres_utils import create_postgres_engine, list_postgres_tables, extract_table_data
+from utils.postgres_utils import (
+    create_postgres_engine, list_postgres_tables, copy_tables_to_csv, postgres_pool_stats,
+    POSTGRES_ROW_LIMIT, POSTGRES_MAX_ROW_LIMIT
+)
+from sqlalchemy.exc import NoSuchTableError
 import uuid
 import pandas as pd
 
@@ -22,16 +45,21 @@ user_controller = UserController()
 
 class GoogleSheetUploadRequest(BaseModel):
     file_type: str
-    sheet_url: str
+    sheet_url: Optional[str] = None
+    # Several tabs of one workbook: its id (or sheet_url) plus a list of gids, or "all"
+    spreadsheet_id: Optional[str] = None
+    gids: Optional[Union[List[Union[int, str]], Literal["all"]]] = None
+    force: bool = False
 
 @user_router.post("/upload-csv")
 async def upload_csv(
     file: UploadFile = File(...), 
     file_type: str = Form(...),
+    force: bool = Form(False),
     user_id: str = Depends(is_authenticated_user)
 ):
     """
-    Upload CSV file and process with Python crew
+    Upload CSV file and start a background crew analysis; poll /reports/{report_id}/status for the result
     """
     try:
         print("[UPLOAD-CSV] Received upload request.")
@@ -42,51 +70,39 @@ async def upload_csv(
             print(f"[UPLOAD-CSV] Invalid file_type: {file_type}")
             raise HTTPException(status_code=400, detail="file_type must be 'csv'")
         
-        # Save uploaded file to sheet_dump
-        file_buffer = await file.read()
+        # Stream the upload to sheet_dump, hashing and counting rows on the way
         print("[UPLOAD-CSV] Saving file to local sheet_dump...")
-        file_path = await upload_csv_to_local(file_buffer, file.filename)
-        print(f"[UPLOAD-CSV] File saved at: {file_path}")
+        upload = await stream_upload_to_local(file, file.filename)
+        file_path = upload.pop("file_path")
+        record_count = upload.pop("record_count")
+        print(f"[UPLOAD-CSV] File saved at: {file_path} ({record_count} lines after the header)")
+        backup_upload_to_s3(file_path, file.filename)
         
-        # Call the Python crew function with the uploaded file path
-        import time
-        start_time = time.time()
-        python_result = await call_python_crew(file_path)
-        processing_time = time.time() - start_time
-        print("[UPLOAD-CSV] Crew result received.")
-        
-        # Create report record
-        from controllers.reportController import create_report_from_analysis
-        import pandas as pd
-        
-        # Get record count from CSV
-        try:
-            df = pd.read_csv(file_path)
-            record_count = len(df)
-        except:
-            record_count = None
-        
-        # Create report record
-        report = await create_report_from_analysis(
+        # Reuse a cached report or start the crew in the background
+        report, cached = await start_analysis(
+            file_path,
+            force=force,
+            known_hashes=upload,
             user_id=user_id,
             source_type="csv",
-            report_content=python_result,
-            file_path=file_path,
             file_name=file.filename,
-            record_count=record_count,
-            processing_time=processing_time
+            record_count=record_count
         )
+        print(f"[UPLOAD-CSV] Report {report.id} is {report.status} (cached: {cached}).")
         
         return JSONResponse(
-            status_code=200,
+            status_code=200 if cached else 202,
             content={
-                "message": "Uploaded successfully",
+                "message": "Uploaded successfully" if cached else "Uploaded successfully, analysis started",
                 "fileType": file_type,
                 "filePath": file_path,
-                "crewResult": python_result,
+                "status": report.status,
+                "cached": cached,
                 "report_id": report.id
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[UPLOAD-CSV] Exception: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -97,7 +113,8 @@ async def upload_google_sheet(
     user_id: str = Depends(is_authenticated_user)
 ):
     """
-    Accept a Google Sheets URL, fetch as CSV, save to sheet_dump, and process with crew.py
+    Accept a Google Sheets URL, fetch as CSV, save to sheet_dump, and start a background crew analysis.
+    With `gids` (a list, or "all"), the tabs are fetched concurrently and analysed together in one report.
     """
     try:
         print("[UPLOAD-GOOGLE-SHEET] Received upload request.")
@@ -105,101 +122,354 @@ async def upload_google_sheet(
             print(f"[UPLOAD-GOOGLE-SHEET] Invalid file_type: {payload.file_type}")
             raise HTTPException(status_code=400, detail="file_type must be 'google_sheet'")
         
-        # Save Google Sheet as CSV to sheet_dump
-        import uuid
-        unique_name = f"{uuid.uuid4()}.csv"
-        from utils.s3upload import create_sheet_dump_directory
-        sheet_dump_dir = create_sheet_dump_directory()
-        file_path = str(sheet_dump_dir / unique_name)
-        print(f"[UPLOAD-GOOGLE-SHEET] Downloading Google Sheet to: {file_path}")
-        
-        import pandas as pd
-        import re
-        match = re.search(r'/d/([a-zA-Z0-9-_]+)', payload.sheet_url)
-        gid_match = re.search(r'gid=([0-9]+)', payload.sheet_url)
-        if not match:
+        try:
+            if payload.spreadsheet_id:
+                file_id, gid = payload.spreadsheet_id, '0'
+            elif payload.sheet_url:
+                file_id, gid = parse_sheet_url(payload.sheet_url)
+            else:
+                raise ValueError("sheet_url or spreadsheet_id is required")
+        except ValueError:
             print("[UPLOAD-GOOGLE-SHEET] Invalid Google Sheet URL.")
             raise HTTPException(status_code=400, detail="Invalid Google Sheet URL")
         
-        file_id = match.group(1)
-        gid = gid_match.group(1) if gid_match else '0'
-        export_url = f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv&gid={gid}"
-        print(f"[UPLOAD-GOOGLE-SHEET] Export URL: {export_url}")
-        df = pd.read_csv(export_url)
-        df.to_csv(file_path, index=False)
-        print(f"[UPLOAD-GOOGLE-SHEET] File saved at: {file_path}")
+        if payload.gids is not None:
+            return await upload_google_sheet_tabs(payload, file_id, user_id)
         
-        # Call the Python crew function with the saved file path
-        import time
-        start_time = time.time()
-        python_result = await call_python_crew(file_path)
-        processing_time = time.time() - start_time
-        print("[UPLOAD-GOOGLE-SHEET] Crew result received.")
-        
-        # Create report record
-        from controllers.reportController import create_report_from_analysis
+        # Stream the tab to sheet_dump; an unchanged sheet is revalidated, not downloaded
+        try:
+            sheet = await fetch_sheet(file_id, gid)
+        except SheetFetchError as e:
+            print(f"[UPLOAD-GOOGLE-SHEET] Fetch failed: {e}")
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        file_path, not_modified = sheet["file_path"], sheet["not_modified"]
+        print(f"[UPLOAD-GOOGLE-SHEET] File saved at: {file_path} (not modified: {not_modified})")
         
-        # Get record count from DataFrame
-        record_count = len(df)
-        
-        # Create report record
-        report = await create_report_from_analysis(
-            user_id=user_id,
-            source_type="google_sheet",
-            report_content=python_result,
-            file_path=file_path,
-            file_name=f"google_sheet_{file_id}.csv",
-            record_count=record_count,
-            processing_time=processing_time
-        )
+        report, cached, memory = await analyze_google_sheet(sheet, file_id, user_id, force=payload.force)
+        print(f"[UPLOAD-GOOGLE-SHEET] Report {report.id} is {report.status} (cached: {cached}).")
         
         return JSONResponse(
-            status_code=200,
+            status_code=200 if cached else 202,
             content={
-                "message": "Google Sheet processed successfully",
+                "message": "Google Sheet processed successfully" if cached else "Google Sheet saved, analysis started",
                 "fileType": payload.file_type,
                 "filePath": file_path,
-                "crewResult": python_result,
-                "report_id": report.id
+                "status": report.status,
+                "cached": cached,
+                "report_id": report.id,
+                "notModified": not_modified,
+                "memory": memory
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[UPLOAD-GOOGLE-SHEET] Exception: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def call_python_crew(file_path: str):
+async def analyze_google_sheet(sheet: dict, file_id: str, user_id: str, force: bool = False):
+    """
+    Store a tab fetched by fetch_sheet with a compact schema and start its analysis
+    (or reuse a cached report). Returns (report, cached, memory report or None).
+    """
+    sheet = dict(sheet)
+    file_path = sheet.pop("file_path")
+    not_modified = sheet.pop("not_modified")
+    record_count = sheet.pop("record_count")
+    memory = None
+    if not not_modified:
+        df, memory = await run_cpu(read_csv_compact, file_path, encoding_errors="replace")
+        print(f"[UPLOAD-GOOGLE-SHEET] Compact dtypes saved {memory['bytes_saved']} of {memory['bytes_before']} bytes")
+        # Columnar copy straight from the frame, so it isn't parsed again
+        await run_cpu(write_parquet_from_frame, df, file_path)
+        record_count = len(df)
+    
+    # Reuse a cached report or start the crew in the background
+    report, cached = await start_analysis(
+        file_path,
+        force=force,
+        user_id=user_id,
+        source_type="google_sheet",
+        known_hashes=sheet,
+        file_name=f"google_sheet_{file_id}.csv",
+        record_count=record_count
+    )
+    return report, cached, memory
+
+async def load_sheet_tab(file_path: str):
+    """Parse and profile one fetched tab; (None, None, None) for an empty tab"""
+    try:
+        df, memory = await run_cpu(read_csv_compact, file_path, encoding_errors="replace")
+    except pd.errors.EmptyDataError:
+        return None, None, None
+    profile = await run_cpu(profile_dataframe, df)
+    return df, memory, profile
+
+async def upload_google_sheet_tabs(payload: GoogleSheetUploadRequest, file_id: str, user_id: str):
     """
-    Call Python crew function with file path and filter output to only return the final user-facing report.
+    Multi-tab variant of upload_google_sheet: fetch the tabs concurrently (bounded by
+    SHEETS_TAB_CONCURRENCY), parse and profile them in parallel, and analyse them as one
+    dataset with a `__tab__` column. The crew gets every tab's profile and writes a
+    section per tab.
     """
+    # Tab names come from the workbook's tab list; explicit gids work without it
+    try:
+        listed = await list_sheet_tabs(file_id)
+    except SheetFetchError as e:
+        if payload.gids == "all":
+            print(f"[UPLOAD-GOOGLE-SHEET] Listing tabs failed: {e}")
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        listed = []
+    names = {tab["gid"]: tab["name"] for tab in listed}
+    if payload.gids == "all":
+        gids = [tab["gid"] for tab in listed]
+    else:
+        gids = list(dict.fromkeys(str(gid) for gid in payload.gids))
+    if not gids:
+        raise HTTPException(status_code=400, detail="gids must name at least one tab")
+    if len(gids) > SHEETS_MAX_TABS:
+        raise HTTPException(status_code=400, detail=f"At most {SHEETS_MAX_TABS} tabs can be analysed together")
+    
     try:
-        print(f"[CREW] Calling crew.py with file_path: {file_path}")
-        result = subprocess.run(
-            ['python', 'crew.py', '--file-path', file_path],
-            capture_output=True,
-            text=True,
-            check=True
+        sheets = await fetch_sheet_tabs(file_id, gids)
+    except SheetFetchError as e:
+        print(f"[UPLOAD-GOOGLE-SHEET] Fetch failed: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    print(f"[UPLOAD-GOOGLE-SHEET] Fetched {len(sheets)} tabs of {file_id}")
+    
+    try:
+        loaded = await asyncio.gather(*(load_sheet_tab(sheet["file_path"]) for sheet in sheets))
+    finally:
+        # The combined file replaces the per-tab ones; their blobs stay for revalidation
+        for sheet in sheets:
+            await run_io(dump_manager.release, sheet["file_path"], keep_blobs=True)
+    
+    dfs, memory_reports, tabs, tab_status = [], [], [], []
+    for gid, sheet, (df, memory, profile) in zip(gids, sheets, loaded):
+        name = names.get(gid, f"gid {gid}")
+        rows = 0 if df is None else len(df)
+        tab_status.append({"gid": gid, "name": name, "rows": rows, "notModified": sheet["not_modified"]})
+        if not rows:
+            continue
+        df['__tab__'] = pd.Categorical([name] * rows)  # Add tab name column for context
+        dfs.append(df)
+        memory_reports.append(memory)
+        tabs.append({"name": name, "gid": gid, "rows": rows, "profile": profile})
+    
+    if not dfs:
+        raise HTTPException(status_code=400, detail="The selected tabs are empty.")
+    
+    combined_df = await run_cpu(concat_frames, dfs)
+    memory = combine_memory_reports(memory_reports, combined_df)
+    print(f"[UPLOAD-GOOGLE-SHEET] Compact dtypes saved {memory['bytes_saved']} of {memory['bytes_before']} bytes")
+    
+    # Save to CSV in sheet_dump
+    from utils.s3upload import create_sheet_dump_directory
+    file_path = str(create_sheet_dump_directory() / f"{uuid.uuid4()}.csv")
+    await run_io(combined_df.to_csv, file_path, index=False)
+    await run_cpu(write_parquet_from_frame, combined_df, file_path)
+    
+    # Reuse a cached report or start the crew in the background
+    report, cached = await start_analysis(
+        file_path,
+        force=payload.force,
+        tabs=tabs,
+        user_id=user_id,
+        source_type="google_sheet",
+        file_name=f"google_sheet_{file_id}_{len(tabs)}_tabs.csv",
+        table_names=[tab["name"] for tab in tabs],
+        record_count=len(combined_df)
+    )
+    print(f"[UPLOAD-GOOGLE-SHEET] Report {report.id} is {report.status} (cached: {cached}).")
+    
+    return JSONResponse(
+        status_code=200 if cached else 202,
+        content={
+            "message": "Google Sheet processed successfully" if cached else "Google Sheet saved, analysis started",
+            "fileType": payload.file_type,
+            "filePath": file_path,
+            "status": report.status,
+            "cached": cached,
+            "report_id": report.id,
+            "tabs": tab_status,
+            "memory": memory
+        }
+    )
+
+async def call_python_crew(
+    file_path: str,
+    profile: Optional[dict] = None,
+    charts: Optional[list] = None,
+    sample: Optional[dict] = None,
+    delta: Optional[dict] = None,
+    tabs: Optional[list] = None,
+    on_event: Optional[Callable[[dict], None]] = None
+):
+    """
+    Run the crew on a file using the pre-warmed crew worker pool.
+    Returns the final user-facing report and the crew's timing metrics.
+    Task progress events are passed to `on_event` as the crew produces them.
+    """
+    try:
+        print(f"[CREW] Running crew on file_path: {file_path}")
+        result = await crew_pool.run(
+            {"file_path": file_path, "profile": profile, "charts": charts, "sample": sample, "delta": delta, "tabs": tabs},
+            on_event=on_event
         )
-        print(f"[CREW] crew.py STDOUT: {result.stdout}")
-        print(f"[CREW] crew.py STDERR: {result.stderr}")
-        # Filter output: only return the text after 'Result:'
-        output = result.stdout
-        if 'Result:' in output:
-            # Get everything after 'Result:'
-            filtered = output.split('Result:', 1)[1]
-            # Remove any trailing logs after the markdown (e.g., 'Final report has been saved...')
-            if "Final report has been saved" in filtered:
-                filtered = filtered.split("Final report has been saved", 1)[0]
-            filtered = filtered.strip()
-            return filtered
-        else:
-            # If 'Result:' not found, return the whole output (fallback)
-            return output.strip()
-    except subprocess.CalledProcessError as e:
-        print(f"[CREW] crew.py failed: {e.stderr}")
+        return result["report"].strip(), result["metrics"]
+    except CrewWorkerError as e:
+        print(f"[CREW] Crew worker failed: {e}")
         raise HTTPException(
             status_code=500, 
-            detail=f"Python crew process failed: {e.stderr}"
+            detail=f"Python crew process failed: {e}"
+        )
+
+async def run_analysis(report, file_path: str, base=None, tabs: Optional[list] = None):
+    """
+    Background analysis pipeline: profile the dataset, render the standard charts,
+    then hand the profile and chart URLs to the crew.
+    When the file extends the dataset of `base`, only the appended rows are profiled and
+    shown to the crew, together with the merged profile and a "what changed" delta.
+    `tabs` are the per-tab profiles of a multi-tab sheet, passed on to the crew.
+    """
+    stages = {}
+    current_stage = None
+    stage_started = 0.0
+    
+    def stage(name: Optional[str]):
+        """Publish the next stage and record how long the previous one took"""
+        nonlocal current_stage, stage_started
+        now = time.perf_counter()
+        if current_stage:
+            stages[current_stage] = round(now - stage_started, 3)
+        current_stage, stage_started = name, now
+        if name:
+            publish_event(report.id, {"type": "stage", "stage": name})
+    
+    # Typed columnar copy, read by profiling, sampling, charts and map-reduce
+    stage("columnar")
+    await run_cpu(ensure_parquet, file_path)
+    
+    stage("profiling")
+    analysis_path, analysis_profile, delta, delta_path = file_path, None, None, None
+    # The appended rows (and their Parquet copy and sample) are only needed until the
+    # crew is done or the merge is abandoned
+    try:
+        if base is not None:
+            delta_path = await run_io(write_appended_rows, file_path, base.data_bytes)
+            await run_cpu(ensure_parquet, delta_path)
+            appended_profile = await run_cpu(profile_csv, delta_path)
+            merged = None
+            if appended_profile and appended_profile["row_count"]:
+                merged = merge_profiles(base.data_profile, appended_profile)
+            if merged:
+                delta = profile_delta(base.data_profile, appended_profile, merged)
+                report.data_profile = merged
+                report.incremental = {"base_report_id": base.id, "delta": delta}
+                analysis_path, analysis_profile = delta_path, appended_profile
+                print(f"[INCREMENTAL] Report {report.id}: {delta['new_rows']} rows appended to report {base.id}")
+        if delta is None:
+            report.data_profile = analysis_profile = await run_cpu(profile_csv, file_path)
+        # Parsed rows; the count taken while the file was streamed is a line count
+        if report.data_profile:
+            report.record_count = report.data_profile["row_count"]
+
+        # Agents read a bounded sample; profile and charts above/below use the full data
+        stage("sampling")
+        sample = await run_cpu(create_llm_sample, analysis_path, analysis_profile)
+
+        stage("charts")
+        chart_specs = await run_cpu(build_chart_specs_from_csv, file_path, report.data_profile)
+        report.charts = await render_charts(chart_specs)
+
+        stage("crew")
+        report_content, metrics = await call_python_crew(
+            analysis_path,
+            report.data_profile,
+            report.charts,
+            sample=sample,
+            delta=delta,
+            tabs=tabs,
+            on_event=threadsafe_event_publisher(report.id)
         )
+    finally:
+        if delta_path:
+            await run_io(remove_appended_rows, delta_path)
+    stage(None)
+    # Time in the crew stage not spent inside the crew itself: worker queue wait and IPC
+    stages["crew_overhead"] = round(
+        stages["crew"] - metrics.get("crew_wall_clock", 0) - metrics.get("crew_setup", 0), 3
+    )
+    metrics["stages"] = stages
+    metrics["sample"] = sample
+    report.processing_breakdown = metrics
+    return report_content
+
+async def start_analysis(file_path: str, force: bool = False, known_hashes: Optional[dict] = None,
+                         tabs: Optional[list] = None, **report_fields):
+    """
+    Create a report for an ingested file. Identical data analysed with the same crew
+    configuration reuses the cached report unless `force` is set; otherwise the crew
+    runs in the background. Returns (report, cached).
+    A file that appends rows to an earlier dataset of the same user is analysed
+    incrementally unless `force` is set. `known_hashes` are hashes computed while
+    the file was written, which saves hashing it again. `tabs` go to run_analysis.
+    """
+    from controllers.reportController import create_report_from_analysis
+    
+    hashes, base = await fingerprint_upload(file_path, report_fields.get("user_id"), known_hashes)
+    content_hash = hashes["content_hash"]
+    await run_io(dump_manager.deduplicate, file_path, hashes["data_hash"])
+    report_fields.update(
+        schema_fingerprint=hashes["schema_fingerprint"],
+        data_hash=hashes["data_hash"],
+        data_bytes=hashes["data_bytes"]
+    )
+    
+    if not force:
+        cached_report = await find_cached_report(content_hash, report_fields.get("user_id"))
+        if cached_report:
+            print(f"[CACHE] Reusing report {cached_report.id} for content hash {content_hash[:12]}")
+            if cached_report.record_count is not None:
+                report_fields["record_count"] = cached_report.record_count
+            report = await create_report_from_analysis(
+                report_content=cached_report.report_content,
+                file_path=file_path,
+                content_hash=content_hash,
+                cached_from=cached_report.id,
+                data_profile=cached_report.data_profile,
+                charts=cached_report.charts,
+                **report_fields
+            )
+            return report, True
+    
+    # Admission control: don't queue more work than the crew pool can drain
+    try:
+        check_admission()
+    except JobQueueFull as e:
+        print(f"[ADMISSION] Rejecting analysis of {file_path}: {e}")
+        # A rejected sheet is fetched again soon; its blob lets that fetch revalidate with a 304
+        await run_io(dump_manager.release, file_path, keep_blobs=report_fields.get("source_type") == "google_sheet")
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    # Create report record in processing state and run the crew in the background;
+    # the reserved slot is held until start_job has registered the job
+    try:
+        report = await create_report_from_analysis(
+            report_content="",
+            file_path=file_path,
+            status="processing",
+            content_hash=content_hash,
+            **report_fields
+        )
+        start_job(report, lambda: run_analysis(report, file_path, None if force else base, tabs))
+    finally:
+        release_admission()
+    return report, False
 
 # User registration and login routes
 @user_router.post("/register")
@@ -289,13 +559,47 @@ async def upload_sheet(file: UploadFile = File(...)):
     try:
         if not file:
             raise HTTPException(status_code=400, detail="No file uploaded")
-        from utils.s3upload import upload_csv_to_local
-        file_buffer = await file.read()
-        file_path = await upload_csv_to_local(file_buffer, file.filename)
-        return {"message": "File uploaded successfully", "filePath": file_path}
+        upload = await stream_upload_to_local(file, file.filename)
+        return {"message": "File uploaded successfully", "filePath": upload["file_path"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@user_router.get("/crew/llm-cache/stats")
+async def llm_cache_stats(user_id: str = Depends(is_authenticated_user)):
+    """
+    Hit/miss counters and size of the crew's LLM response cache
+    """
+    return await run_io(lambda: get_llm_cache().stats())
+
+@user_router.get("/crew/stats")
+async def crew_stats(user_id: str = Depends(is_authenticated_user)):
+    """
+    Crew worker utilization, queue depth and wait times
+    """
+    return {**crew_pool.stats(), **admission_stats()}
+
+@user_router.get("/executors/stats")
+async def executors_stats(user_id: str = Depends(is_authenticated_user)):
+    """
+    Utilization, queue depth and wait times of the IO and CPU executor pools
+    """
+    return executor_stats()
+
+@user_router.get("/storage/stats")
+async def storage_stats(user_id: str = Depends(is_authenticated_user)):
+    """
+    sheet_dump disk usage, deduplication savings, quota and evictions
+    """
+    return await dump_manager.stats()
+
+@user_router.get("/postgres/stats")
+async def postgres_stats(user_id: str = Depends(is_authenticated_user)):
+    """
+    Cached PostgreSQL engines and their pools' usage, checkouts and connection wait
+    times, as totals over all databases
+    """
+    return postgres_pool_stats()
+
 # Admin routes
 @user_router.get("/admin/users")
 async def get_all_users(user_id: str = Depends(is_authenticated_user)):
@@ -313,17 +617,24 @@ class PostgresConnectRequest(BaseModel):
 
 class PostgresAnalyzeRequest(PostgresConnectRequest):
     tables: list
+    force: bool = False
+    # Rows extracted per table; POSTGRES_ROW_LIMIT when omitted
+    limit: Optional[int] = None
 
 @user_router.post("/postgres/connect")
-async def postgres_connect(payload: PostgresConnectRequest):
+async def postgres_connect(
+    payload: PostgresConnectRequest,
+    user_id: str = Depends(is_authenticated_user)
+):
     """
     Connect to PostgreSQL and return list of table names.
     """
     try:
-        engine = create_postgres_engine(
-            payload.host, payload.port, payload.dbname, payload.user, payload.password
+        # Cached per database; creating one may dispose the least recently used engine
+        engine = await run_io(
+            create_postgres_engine, payload.host, payload.port, payload.dbname, payload.user, payload.password
         )
-        tables = list_postgres_tables(engine)
+        tables = await run_io(list_postgres_tables, engine)
         return {"tables": tables}
     except Exception as e:
         print(f"[POSTGRES-CONNECT] Exception: {e}")
@@ -335,64 +646,63 @@ async def postgres_analyze(
     user_id: str = Depends(is_authenticated_user)
 ):
     """
-    Extract data from selected tables, save as CSV, and process with crew.py
+    Stream up to `limit` rows of each selected table into a CSV (COPY ... TO STDOUT) and start a background crew analysis
     """
     try:
-        engine = create_postgres_engine(
-            payload.host, payload.port, payload.dbname, payload.user, payload.password
-        )
-        # Combine all selected tables into one DataFrame
-        dfs = []
-        total_records = 0
-        for table in payload.tables:
-            df = extract_table_data(engine, table)
-            df['__table__'] = table  # Add table name column for context
-            dfs.append(df)
-            total_records += len(df)
-        
-        if not dfs:
+        limit = POSTGRES_ROW_LIMIT if payload.limit is None else payload.limit
+        if limit < 1 or (POSTGRES_MAX_ROW_LIMIT and limit > POSTGRES_MAX_ROW_LIMIT):
+            raise HTTPException(status_code=400, detail=f"limit must be between 1 and {POSTGRES_MAX_ROW_LIMIT}")
+        if not payload.tables:
             raise HTTPException(status_code=400, detail="No tables selected or tables are empty.")
         
-        combined_df = pd.concat(dfs, ignore_index=True)
+        # Cached per database; creating one may dispose the least recently used engine
+        engine = await run_io(
+            create_postgres_engine, payload.host, payload.port, payload.dbname, payload.user, payload.password
+        )
         
-        # Save to CSV in sheet_dump
+        # Stream all selected tables into one CSV in sheet_dump, with a __table__ column for context
         from utils.s3upload import create_sheet_dump_directory
-        sheet_dump_dir = create_sheet_dump_directory()
-        unique_name = f"{uuid.uuid4()}.csv"
-        file_path = str(sheet_dump_dir / unique_name)
-        combined_df.to_csv(file_path, index=False)
-        
-        # Call crew.py for analysis
-        import time
-        start_time = time.time()
-        python_result = await call_python_crew(file_path)
-        processing_time = time.time() - start_time
-        
-        # Create report record
-        from controllers.reportController import create_report_from_analysis
+        file_path = str(create_sheet_dump_directory() / f"{uuid.uuid4()}.csv")
+        try:
+            rows = await run_io(copy_tables_to_csv, engine, payload.tables, file_path, limit)
+        except NoSuchTableError as e:
+            await run_io(dump_manager.release, file_path)
+            raise HTTPException(status_code=400, detail=f"Table not found: {e}")
+        except Exception:
+            await run_io(dump_manager.release, file_path)
+            raise
+        total_records = sum(rows.values())
+        print(f"[POSTGRES-ANALYZE] Copied {total_records} rows from {len(rows)} table(s) to {file_path}")
+        if not total_records:
+            await run_io(dump_manager.release, file_path)
+            raise HTTPException(status_code=400, detail="No tables selected or tables are empty.")
         
-        # Create report record
-        report = await create_report_from_analysis(
+        # Reuse a cached report or start the crew in the background
+        report, cached = await start_analysis(
+            file_path,
+            force=payload.force,
             user_id=user_id,
             source_type="postgres",
-            report_content=python_result,
-            file_path=file_path,
             file_name=f"postgres_tables_{len(payload.tables)}.csv",
             table_names=payload.tables,
-            record_count=total_records,
-            processing_time=processing_time
+            record_count=total_records
         )
+        print(f"[POSTGRES-ANALYZE] Report {report.id} is {report.status} (cached: {cached}).")
         
         return JSONResponse(
-            status_code=200,
+            status_code=200 if cached else 202,
             content={
-                "message": "PostgreSQL table(s) analyzed successfully",
+                "message": "PostgreSQL table(s) analyzed successfully" if cached else "PostgreSQL table(s) extracted, analysis started",
                 "fileType": "postgres",
                 "filePath": file_path,
-                "crewResult": python_result,
-                "report_id": report.id
+                "status": report.status,
+                "cached": cached,
+                "report_id": report.id,
+                "rows": rows
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[POSTGRES-ANALYZE] Exception: {e}")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
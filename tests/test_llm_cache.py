@@ -0,0 +1,77 @@
+import os
+import uuid
+import shutil
+import pathlib
+
+import pytest
+
+os.environ.setdefault("CREW_LLM_FACTORY", "benchmarks.stub_llm:create_stub_llm")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def crew_module(monkeypatch, tmp_path):
+    # crew.py loads its YAML configs relative to the working directory
+    monkeypatch.chdir(ROOT)
+    import crew
+    import utils.cached_llm as cached_llm
+    from utils.llm_cache import LLMResponseCache
+
+    cache = LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(crew, "LLM_FACTORY", "benchmarks.stub_llm:create_stub_llm")
+    monkeypatch.setattr(cached_llm, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(cached_llm, "get_llm_cache", lambda: cache)
+    return crew, cache
+
+
+def test_identical_uploads_share_llm_cache(crew_module, tmp_path):
+    """Two uploads of the same data (different dump paths) hit the cache on the second run"""
+    crew, cache = crew_module
+    from utils.data_profiler import profile_csv
+
+    assert crew.RAW_FILE_FALLBACK
+    runs = []
+    for _ in range(2):
+        # Uploads are dumped under a fresh UUID name
+        file_path = tmp_path / f"{uuid.uuid4()}.csv"
+        shutil.copy(ROOT / "sales_data_sample.csv", file_path)
+        crew.run_crew_job(str(file_path), profile_csv(str(file_path)))
+        runs.append(cache.stats())
+
+    first, second = runs
+    assert first["hits"] == 0 and first["misses"] > 0
+    assert second["misses"] == first["misses"]
+    assert second["hits"] == first["misses"]
+
+
+def test_stop_words_reach_inner_llm(tmp_path):
+    """The executor's stop override on the wrapper applies to the wrapped LLM and the key"""
+    from crewai.llms.base_llm import call_stop_override
+    from benchmarks.stub_llm import StubLLM
+    from utils.cached_llm import CachedLLM
+    from utils.llm_cache import LLMResponseCache
+
+    class RecordingLLM(StubLLM):
+        seen: list = []
+
+        def call(self, messages, **kwargs):
+            self.seen.append(list(self.stop_sequences))
+            return super().call(messages, **kwargs)
+
+    inner = RecordingLLM(model="stub-llm")
+    llm = CachedLLM(inner=inner, cache=LLMResponseCache(path=str(tmp_path / "llm_cache.sqlite3")))
+    messages = [{"role": "user", "content": "Describe the dataset"}]
+
+    with call_stop_override(llm, ["\nObservation:"]):
+        llm.call(messages)
+    assert inner.seen == [["\nObservation:"]]
+
+    # Without the stop words it is a different request, not a cache hit
+    llm.call(messages)
+    assert inner.seen == [["\nObservation:"], []]
+    with call_stop_override(llm, ["\nObservation:"]):
+        llm.call(messages)
+    assert len(inner.seen) == 2
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+import utils.s3upload as s3upload
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_stub(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_BUCKET_NAME", "uploads-test")
+    # Small parts, one at a time, so the stubbed responses are consumed in order
+    monkeypatch.setattr(s3upload, "S3_MULTIPART_THRESHOLD", PART_SIZE)
+    monkeypatch.setattr(s3upload, "S3_MULTIPART_CHUNK_SIZE", PART_SIZE)
+    monkeypatch.setattr(s3upload, "S3_MAX_CONCURRENCY", 1)
+    s3upload.reset_s3_client()
+    with Stubber(s3upload.get_s3_client()) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+    s3upload.reset_s3_client()
+
+
+def test_backup_uses_multipart_upload(s3_stub, tmp_path):
+    """Files above the threshold go up as a multipart upload through the shared client"""
+    file_path = tmp_path / "large.csv"
+    file_path.write_bytes(b"a,b\n" + b"1,2\n" * (PART_SIZE * 5 // 2 // 4))
+    key_args = {"Bucket": "uploads-test", "Key": ANY}
+    s3_stub.add_response(
+        "create_multipart_upload", {"UploadId": "upload-1"}, {**key_args, "ContentType": "text/csv", "ChecksumAlgorithm": ANY}
+    )
+    for part in range(1, 4):
+        s3_stub.add_response(
+            "upload_part", {"ETag": f'"etag-{part}"'},
+            {**key_args, "UploadId": "upload-1", "PartNumber": part, "Body": ANY, "ChecksumAlgorithm": ANY}
+        )
+    s3_stub.add_response(
+        "complete_multipart_upload", {},
+        {**key_args, "UploadId": "upload-1", "MultipartUpload": {"Parts": [
+            {"ETag": f'"etag-{part}"', "PartNumber": part} for part in range(1, 4)
+        ]}}
+    )
+
+    async def backup():
+        return await s3upload.backup_upload_to_s3(str(file_path), "large.csv")
+
+    url = asyncio.run(backup())
+    assert url.startswith("https://uploads-test.s3.us-east-1.amazonaws.com/uploads/csv/")
+    assert url.endswith(".csv")
+
+
+def test_backup_skipped_without_settings(monkeypatch):
+    monkeypatch.delenv("AWS_BUCKET_NAME", raising=False)
+
+    async def backup():
+        return s3upload.backup_upload_to_s3("missing.csv", "missing.csv")
+
+    assert asyncio.run(backup()) is None
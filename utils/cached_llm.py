@@ -0,0 +1,78 @@
+from typing import Any
+
+from crewai.llms.base_llm import BaseLLM, call_stop_override
+
+from utils.llm_cache import LLM_CACHE_ENABLED, LLMResponseCache, get_llm_cache
+from utils.llm_usage import usage_recorder
+
+
+class CachedLLM(BaseLLM):
+    """
+    Wraps the LLM used by the crew agents and serves repeated calls from an LLMResponseCache
+    """
+
+    inner: BaseLLM
+    cache: Any
+
+    def __init__(self, inner: BaseLLM, cache: LLMResponseCache, **kwargs):
+        super().__init__(model=inner.model, temperature=inner.temperature, inner=inner, cache=cache, **kwargs)
+
+    def _stop_words(self) -> list:
+        """
+        Stop words for this call: the agent executor sets its ReAct stops ("\nObservation:")
+        as a call-scoped override on the LLM it holds, which is this wrapper
+        """
+        return sorted(set(self.inner.stop) | set(self.stop_sequences))
+
+    def _cache_key(self, messages: Any, tools: Any, response_model: Any, stop: list) -> str:
+        params = {
+            "temperature": self.inner.temperature,
+            "stop": stop,
+            "tools": [getattr(tool, "name", str(tool)) for tool in tools or []],
+            "response_model": getattr(response_model, "__name__", None),
+        }
+        return LLMResponseCache.make_key(self.inner.model, messages, params)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        stop = self._stop_words()
+        key = self._cache_key(messages, tools, response_model, stop)
+        cached = self.cache.get(key)
+        if cached is not None:
+            usage_recorder.cache_hit(getattr(from_task, "name", None))
+            return cached
+
+        # Forward the override so the wrapped LLM stops where the agent expects
+        with call_stop_override(self.inner, stop):
+            response = self.inner.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model
+            )
+        # Only plain text answers are cacheable; tool-call objects must reach the agent
+        if isinstance(response, str):
+            self.cache.set(key, self.inner.model, response)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.inner.get_token_usage_summary()
+
+
+def with_cache(llm: BaseLLM) -> BaseLLM:
+    """Wrap an LLM with the response cache when LLM_CACHE_ENABLED"""
+    if not LLM_CACHE_ENABLED:
+        return llm
+    return CachedLLM(inner=llm, cache=get_llm_cache())
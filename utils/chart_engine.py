@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+import pathlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from utils.columnar_store import read_dataset
+
+# Chart engine configuration
+CHARTS_DIR = pathlib.Path(os.getenv("CHARTS_DIR", str(pathlib.Path(__file__).parent.parent / "charts")))
+CHART_BASE_URL = os.getenv("CHART_BASE_URL", "/charts").rstrip("/")
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+CHART_MAX_PER_REPORT = int(os.getenv("CHART_MAX_PER_REPORT", "5"))
+CHART_MAX_CATEGORIES = 12
+
+# Columns that identify rows rather than measure anything (ORDERNUMBER, YEAR_ID, PRODUCTCODE, ...)
+ID_LIKE = re.compile(r"(^|_)id$|number$|code$", re.IGNORECASE)
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=CHART_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _render_pool
+
+
+def shutdown_render_pool():
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+def _round(value: Any) -> Any:
+    return round(float(value), 4) if pd.notna(value) else None
+
+
+def _parse_dates(series: pd.Series) -> Optional[pd.Series]:
+    """Parse a column as dates if at least 80% of its values are dates"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+    if parsed.notna().mean() < 0.8:
+        return None
+    return parsed
+
+
+def chart_columns(profile: Dict[str, Any]):
+    """Candidate (categories, metrics, date columns) for the standard charts"""
+    columns = profile["columns"]
+    row_count = profile["row_count"]
+
+    categories = [
+        name for name, info in columns.items()
+        if info["kind"] == "categorical" and 2 <= (info["unique_count"] or 0) <= CHART_MAX_CATEGORIES
+    ]
+    metrics = [
+        name for name, info in columns.items()
+        if info["kind"] == "numeric" and not ID_LIKE.search(name)
+        and 1 < (info["unique_count"] or 0) and info["null_count"] < row_count
+    ]
+    date_candidates = [
+        name for name, info in columns.items()
+        if info["kind"] == "datetime" or (info["kind"] == "categorical" and "date" in name.lower())
+    ]
+    return categories, metrics, date_candidates
+
+
+def build_chart_specs(df: pd.DataFrame, profile: Dict[str, Any], max_charts: int = CHART_MAX_PER_REPORT) -> List[Dict[str, Any]]:
+    """
+    Derive standard chart specs (distribution, time series, grouped comparison) from a
+    dataset and its profile. Each spec carries its own aggregated table, so rendering
+    doesn't need the DataFrame.
+    """
+    categories, metrics, date_candidates = chart_columns(profile)
+
+    specs = []
+
+    # Distribution of the first categorical columns
+    for column in categories[:2]:
+        counts = df[column].value_counts().head(CHART_MAX_CATEGORIES)
+        specs.append({
+            "kind": "distribution",
+            "title": f"Distribution of {column}",
+            "xlabel": column,
+            "ylabel": "Count",
+            "labels": [str(label) for label in counts.index],
+            "values": [int(value) for value in counts.values],
+        })
+
+    # Monthly trend of the main metric (or record count) over the first date column
+    for column in date_candidates[:1]:
+        dates = _parse_dates(df[column])
+        if dates is None:
+            continue
+        periods = dates.dt.to_period("M")
+        if metrics:
+            series = df[metrics[0]].groupby(periods).sum()
+            ylabel = f"Total {metrics[0]}"
+        else:
+            series = periods.value_counts().sort_index()
+            ylabel = "Records"
+        if len(series) < 2:
+            continue
+        specs.append({
+            "kind": "time_series",
+            "title": f"{ylabel} over time",
+            "xlabel": column,
+            "ylabel": ylabel,
+            "labels": [str(period) for period in series.index],
+            "values": [_round(value) for value in series.values],
+        })
+
+    # Average of each metric per category
+    for category, metric in zip(categories, metrics):
+        means = df.groupby(category, observed=True)[metric].mean().sort_values(ascending=False).head(CHART_MAX_CATEGORIES)
+        specs.append({
+            "kind": "grouped",
+            "title": f"Average {metric} by {category}",
+            "xlabel": category,
+            "ylabel": f"Average {metric}",
+            "labels": [str(label) for label in means.index],
+            "values": [_round(value) for value in means.values],
+        })
+
+    return specs[:max_charts]
+
+
+def chart_file_name(spec: Dict[str, Any]) -> str:
+    """Content-addressed file name: the same chart is only ever rendered once"""
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{digest[:24]}.png"
+
+
+def render_chart(spec: Dict[str, Any]) -> str:
+    """
+    Render one chart spec to CHARTS_DIR with a headless backend. Runs in the render pool.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    file_name = chart_file_name(spec)
+    path = CHARTS_DIR / file_name
+    if path.exists():
+        return file_name
+
+    fig, ax = plt.subplots(figsize=(8, 4.5))
+    positions = range(len(spec["labels"]))
+    if spec["kind"] == "time_series":
+        ax.plot(positions, spec["values"], marker="o")
+    else:
+        ax.bar(positions, spec["values"])
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(spec["labels"], rotation=45, ha="right", fontsize=8)
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    fig.tight_layout()
+
+    # Write under a temporary name so readers never see a half-written PNG
+    tmp_path = CHARTS_DIR / f".{file_name}.{os.getpid()}.tmp"
+    fig.savefig(tmp_path, format="png", dpi=100)
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return file_name
+
+
+async def render_charts(specs: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Render chart specs in parallel and return their titles and URLs. Charts are optional:
+    failed ones are left out, and a broken render pool is replaced on the next call.
+    """
+    if not specs:
+        return []
+    CHARTS_DIR.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    pool = _get_render_pool()
+    try:
+        futures = [loop.run_in_executor(pool, render_chart, spec) for spec in specs]
+    except BrokenProcessPool as e:
+        results = [e] * len(specs)
+    else:
+        results = await asyncio.gather(*futures, return_exceptions=True)
+
+    charts = []
+    for spec, result in zip(specs, results):
+        if isinstance(result, BaseException):
+            print(f"[CHARTS] Rendering '{spec['title']}' failed: {result!r}")
+            continue
+        charts.append({"title": spec["title"], "kind": spec["kind"], "url": f"{CHART_BASE_URL}/{result}"})
+    # A worker died; don't leave the broken pool for later analyses (unless already replaced)
+    if any(isinstance(result, BrokenProcessPool) for result in results) and _render_pool is pool:
+        shutdown_render_pool()
+    return charts
+
+
+def build_chart_specs_from_csv(file_path: str, profile: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Load the charted columns of a dataset and derive its standard chart specs; no charts if there is no profile"""
+    if not profile:
+        return []
+    try:
+        categories, metrics, date_candidates = chart_columns(profile)
+        needed = list(dict.fromkeys(categories + metrics + date_candidates[:1]))
+        if not needed:
+            return []
+        df = read_dataset(file_path, columns=needed)
+        return build_chart_specs(df, profile)
+    except Exception as e:
+        print(f"[CHARTS] Could not build chart specs for {file_path}: {e}")
+        return []
@@ -0,0 +1,122 @@
+import os
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+# Convert each ingested CSV once into a Parquet file next to it
+COLUMNAR_STORE = os.getenv("COLUMNAR_STORE", "true").lower() == "true"
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP_ROWS = 128 * 1024
+CSV_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def parquet_path_for(csv_path: str) -> str:
+    return f"{os.path.splitext(csv_path)[0]}.parquet"
+
+
+def has_parquet(csv_path: str) -> bool:
+    return COLUMNAR_STORE and os.path.exists(parquet_path_for(csv_path))
+
+
+def _write_atomically(write, parquet_path: str):
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_parquet_from_frame(df: pd.DataFrame, csv_path: str) -> Optional[str]:
+    """Store a DataFrame that is already in memory as the Parquet copy of `csv_path`"""
+    if not COLUMNAR_STORE:
+        return None
+    parquet_path = parquet_path_for(csv_path)
+    _write_atomically(
+        lambda path: df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION,
+                                   row_group_size=PARQUET_ROW_GROUP_ROWS),
+        parquet_path
+    )
+    return parquet_path
+
+
+def convert_csv_to_parquet(csv_path: str) -> Optional[str]:
+    """
+    Convert a CSV to compressed Parquet in one streaming pass, with column types inferred
+    by Arrow. Falls back to pandas (lenient decoding) for files Arrow can't stream,
+    e.g. non UTF-8 text or a column whose type changes after the first block.
+    Returns the Parquet path, or None if the file can't be parsed at all.
+    """
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    parquet_path = parquet_path_for(csv_path)
+
+    def stream(path: str):
+        reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE))
+        with pq.ParquetWriter(path, reader.schema, compression=PARQUET_COMPRESSION) as writer:
+            for batch in reader:
+                writer.write_batch(batch, row_group_size=PARQUET_ROW_GROUP_ROWS)
+
+    try:
+        _write_atomically(stream, parquet_path)
+    except Exception as e:
+        print(f"[COLUMNAR] Arrow could not stream {csv_path} ({e}); converting with pandas")
+        try:
+            df = pd.read_csv(csv_path, encoding_errors="replace")
+        except Exception as e:
+            print(f"[COLUMNAR] Could not parse {csv_path}: {e}")
+            return None
+        write_parquet_from_frame(df, csv_path)
+    return parquet_path
+
+
+def ensure_parquet(csv_path: str) -> Optional[str]:
+    """Parquet copy of an ingested CSV, converting it if there is none yet"""
+    if not COLUMNAR_STORE:
+        return None
+    if has_parquet(csv_path):
+        return parquet_path_for(csv_path)
+    return convert_csv_to_parquet(csv_path)
+
+
+def read_dataset(csv_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a dataset, only the given columns if any. Uses memory-mapped reads of the
+    Parquet copy when there is one, otherwise parses the CSV.
+    """
+    if has_parquet(csv_path):
+        import pyarrow.parquet as pq
+        table = pq.read_table(parquet_path_for(csv_path), columns=columns, memory_map=True)
+        return table.to_pandas()
+    return pd.read_csv(csv_path, usecols=columns, encoding_errors="replace")
+
+
+def read_rows(csv_path: str, indices: List[int]) -> pd.DataFrame:
+    """Rows at the given positions, read from the Parquet copy"""
+    import pyarrow.parquet as pq
+    table = pq.read_table(parquet_path_for(csv_path), memory_map=True)
+    return table.take(indices).to_pandas()
+
+
+def iter_row_batches(csv_path: str, batch_rows: int) -> Iterator[pd.DataFrame]:
+    """Consecutive batches of exactly `batch_rows` rows (the last may be shorter), without loading the dataset"""
+    if has_parquet(csv_path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(parquet_path_for(csv_path), memory_map=True)
+        # Arrow batches stop at row group boundaries; re-slice them to the requested size
+        buffer, buffered = [], 0
+        for batch in parquet_file.iter_batches(batch_size=batch_rows):
+            buffer.append(batch)
+            buffered += batch.num_rows
+            while buffered >= batch_rows:
+                table = pa.Table.from_batches(buffer)
+                yield table.slice(0, batch_rows).to_pandas()
+                rest = table.slice(batch_rows)
+                buffer, buffered = rest.to_batches(), rest.num_rows
+        if buffered:
+            yield pa.Table.from_batches(buffer).to_pandas()
+        return
+    yield from pd.read_csv(csv_path, chunksize=batch_rows, encoding_errors="replace")
@@ -0,0 +1,213 @@
+import os
+import math
+import asyncio
+import time
+import heapq
+import itertools
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from models.reportModel import Report
+from utils.crew_pool import CREW_POOL_SIZE, crew_pool
+
+# Events kept per job so late subscribers can catch up. Crew stdout ("log" events) has its
+# own, smaller buffer so chatty agents can't push task and stage events out of the history.
+EVENT_HISTORY_LIMIT = 500
+LOG_HISTORY_LIMIT = 100
+# Seconds between keep-alives on an idle event stream
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Jobs allowed to wait for a crew worker; beyond this new analyses are rejected with 429
+CREW_MAX_QUEUE = int(os.getenv("CREW_MAX_QUEUE", "8"))
+MAX_ACTIVE_JOBS = CREW_POOL_SIZE + CREW_MAX_QUEUE
+# Lower bound for the Retry-After hint sent to rejected clients
+MIN_RETRY_AFTER_SECONDS = 5
+
+# In-flight analysis jobs, keyed by report id
+_jobs: Dict[str, asyncio.Task] = {}
+# Slots taken by admitted analyses that are not in _jobs yet
+_reserved = 0
+
+
+class JobEvents:
+    """
+    Progress events of one analysis job, fanned out to every subscriber
+    """
+
+    def __init__(self):
+        self._sequence = itertools.count()
+        self.history = deque(maxlen=EVENT_HISTORY_LIMIT)
+        self.logs = deque(maxlen=LOG_HISTORY_LIMIT)
+        self.subscribers = set()
+        self.closed = False
+
+    def publish(self, event: dict):
+        buffer = self.logs if event.get("type") == "log" else self.history
+        buffer.append((next(self._sequence), event))
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def replay(self) -> list:
+        """Buffered events in the order they were published"""
+        return [event for _, event in heapq.merge(self.history, self.logs, key=lambda item: item[0])]
+
+    def close(self):
+        self.closed = True
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+
+
+_events: Dict[str, JobEvents] = {}
+
+
+def publish_event(report_id: str, event: dict):
+    """Publish a progress event for a job (must be called on the event loop)"""
+    channel = _events.get(report_id)
+    if channel is not None:
+        channel.publish(event)
+
+
+def threadsafe_event_publisher(report_id: str) -> Callable[[dict], None]:
+    """Return a callback that publishes job events from any thread"""
+    loop = asyncio.get_running_loop()
+
+    def publish(event: dict):
+        loop.call_soon_threadsafe(publish_event, report_id, event)
+
+    return publish
+
+
+async def subscribe(report_id: str) -> AsyncIterator[Optional[dict]]:
+    """
+    Yield past and live events of a running job until it finishes.
+    Yields None after EVENT_KEEPALIVE_SECONDS without events so callers can send keep-alives.
+    """
+    channel = _events.get(report_id)
+    if channel is None:
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for event in channel.replay():
+        queue.put_nowait(event)
+    if channel.closed:
+        queue.put_nowait(None)
+    channel.subscribers.add(queue)
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is None:
+                break
+            yield event
+    finally:
+        channel.subscribers.discard(queue)
+
+
+async def _run_job(report: Report, work: Callable[[], Awaitable[str]]):
+    """
+    Run the analysis for a report and record the outcome on the report document
+    """
+    start_time = time.time()
+    try:
+        report.report_content = await work()
+        report.status = "completed"
+        print(f"[JOB] Report {report.id} completed.")
+    except asyncio.CancelledError:
+        report.status = "cancelled"
+        report.error_message = "Analysis was cancelled"
+        print(f"[JOB] Report {report.id} cancelled.")
+    except Exception as e:
+        report.status = "failed"
+        report.error_message = getattr(e, "detail", None) or str(e)
+        print(f"[JOB] Report {report.id} failed: {e}")
+    finally:
+        report.processing_time = time.time() - start_time
+        # Persist the outcome before the job stops counting as running, so status
+        # readers falling back to Mongo never see a finished job as "processing"
+        try:
+            await report.save()
+        finally:
+            _jobs.pop(report.id, None)
+
+        if report.status == "completed":
+            publish_event(report.id, {"type": "report", "markdown": report.report_content})
+        publish_event(report.id, {
+            "type": "done",
+            "status": report.status,
+            "error_message": report.error_message,
+            "processing_time": report.processing_time
+        })
+        channel = _events.pop(report.id, None)
+        if channel is not None:
+            channel.close()
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when the analysis queue is full; retry_after estimates when a slot frees up
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def check_admission():
+    """
+    Reject new analyses once every crew worker is busy and the wait queue is full.
+    Otherwise reserve a slot in the same step, so concurrent requests can't all pass the
+    check; the caller gives it back with release_admission once start_job has run (or failed).
+    """
+    global _reserved
+    active = len(_jobs) + _reserved
+    if active < MAX_ACTIVE_JOBS:
+        _reserved += 1
+        return
+    # Jobs ahead of this one drain pool_size at a time, each taking about the average run time
+    average_run = crew_pool.average_run_time() or 60.0
+    excess = active - MAX_ACTIVE_JOBS + 1
+    retry_after = math.ceil(average_run * excess / crew_pool.size)
+    raise JobQueueFull(max(MIN_RETRY_AFTER_SECONDS, retry_after))
+
+
+def release_admission():
+    """Give back a slot reserved by check_admission"""
+    global _reserved
+    _reserved = max(_reserved - 1, 0)
+
+
+def admission_stats() -> dict:
+    return {
+        "active_jobs": len(_jobs),
+        "reserved_slots": _reserved,
+        "max_active_jobs": MAX_ACTIVE_JOBS,
+        "max_queue": CREW_MAX_QUEUE,
+    }
+
+
+def start_job(report: Report, work: Callable[[], Awaitable[str]]) -> asyncio.Task:
+    """
+    Run `work` in the background for a report created with status "processing"
+    """
+    _events[report.id] = JobEvents()
+    task = asyncio.create_task(_run_job(report, work))
+    _jobs[report.id] = task
+    return task
+
+
+def is_running(report_id: str) -> bool:
+    return report_id in _jobs
+
+
+def cancel_job(report_id: str) -> bool:
+    """
+    Cancel a running job. Returns False if no job is running for the report.
+    """
+    task: Optional[asyncio.Task] = _jobs.get(report_id)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
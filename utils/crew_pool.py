@@ -0,0 +1,285 @@
+import os
+import sys
+import asyncio
+import threading
+import multiprocessing
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+# Pool configuration
+CREW_POOL_SIZE = int(os.getenv("CREW_POOL_SIZE", "2"))
+CREW_WORKER_MAX_JOBS = int(os.getenv("CREW_WORKER_MAX_JOBS", "20"))
+# Seconds a single crew job may run before its worker is killed
+CREW_JOB_TIMEOUT_SECONDS = float(os.getenv("CREW_JOB_TIMEOUT_SECONDS", "900"))
+# Number of recent jobs used for wait/run time averages
+STATS_WINDOW = 50
+
+# Spawn (not fork) so workers never inherit the server's event loop or Mongo clients
+_mp_context = multiprocessing.get_context("spawn")
+
+
+# Longest stdout line forwarded to the server as a progress event
+MAX_LOG_LINE = 1000
+
+
+class _EventWriter:
+    """
+    Stand-in for sys.stdout inside a worker: echoes output and forwards each
+    complete line to the server as a "log" event
+    """
+
+    def __init__(self, send_event, stream):
+        self._send_event = send_event
+        self._stream = stream
+        self._buffer = ""
+
+    def write(self, text):
+        self._stream.write(text)
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            if line.strip():
+                self._send_event({"type": "log", "line": line[:MAX_LOG_LINE]})
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def isatty(self):
+        return False
+
+
+def _worker_main(conn):
+    """
+    Worker process entry point: import crew.py once, then serve jobs until told to stop
+    """
+    import crew  # loads crewai, crewai_tools and the YAML configs exactly once
+
+    # crewai runs parallel tasks in threads, so sends on the pipe must be serialised
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def send_event(event):
+        send(("event", event))
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+
+        command = message[0]
+        if command == "stop":
+            break
+
+        if command == "run":
+            job = message[1]
+            stdout = sys.stdout
+            sys.stdout = _EventWriter(send_event, stdout)
+            try:
+                result = crew.run_crew_job(**job, on_event=send_event)
+                send(("result", result))
+            except Exception:
+                send(("error", traceback.format_exc()))
+            finally:
+                sys.stdout = stdout
+
+    conn.close()
+
+
+class CrewWorkerError(Exception):
+    """Raised when a crew worker fails to produce a report"""
+    pass
+
+
+class CrewWorker:
+    """
+    A single long-lived crew process talking to the server over a pipe
+    """
+
+    def __init__(self):
+        self.conn, child_conn = _mp_context.Pipe()
+        self.process = _mp_context.Process(
+            target=_worker_main,
+            args=(child_conn,),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+        self.ready = False
+
+    def _wait_ready(self):
+        """Block until the worker has finished importing crew.py"""
+        if self.ready:
+            return
+        kind, payload = self.conn.recv()
+        if kind != "ready":
+            raise CrewWorkerError(f"Unexpected message from crew worker: {kind}")
+        self.ready = True
+
+    def run(self, job: dict, on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Run one crew job in this worker (blocking). `job` holds the keyword arguments of
+        crew.run_crew_job (file_path, profile, charts, sample, delta, tabs); returns {"report", "metrics"}.
+        Progress events from the worker are passed to `on_event` as they arrive.
+        """
+        try:
+            self._wait_ready()
+            self.conn.send(("run", job))
+            kind, payload = self.conn.recv()
+            while kind == "event":
+                if on_event:
+                    on_event(payload)
+                kind, payload = self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            raise CrewWorkerError(f"Crew worker {self.process.pid} died: {e}")
+
+        self.jobs_done += 1
+        if kind == "error":
+            raise CrewWorkerError(payload)
+        return payload
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 5):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(("stop",))
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class CrewWorkerPool:
+    """
+    Pool of pre-warmed crew workers. Each worker is recycled after `max_jobs` jobs.
+    """
+
+    def __init__(self, size: int = CREW_POOL_SIZE, max_jobs: int = CREW_WORKER_MAX_JOBS,
+                 job_timeout: float = CREW_JOB_TIMEOUT_SECONDS):
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self.job_timeout = job_timeout
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._start_lock = asyncio.Lock()
+
+        # Monitoring
+        self.waiting = 0
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self._wait_times = deque(maxlen=STATS_WINDOW)
+        self._run_times = deque(maxlen=STATS_WINDOW)
+
+    async def start(self):
+        """Spawn all workers; they import crew.py in the background"""
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            idle = asyncio.Queue()
+            for _ in range(self.size):
+                worker = await asyncio.to_thread(CrewWorker)
+                self._workers.append(worker)
+                idle.put_nowait(worker)
+            self._idle = idle
+        print(f"[CREW-POOL] Started {self.size} crew worker(s), recycling after {self.max_jobs} job(s)")
+
+    async def stop(self):
+        for worker in self._workers:
+            await asyncio.to_thread(worker.stop)
+        self._workers = []
+        self._idle = None
+        print("[CREW-POOL] All crew workers stopped")
+
+    async def _replace(self, worker: CrewWorker, reason: str) -> CrewWorker:
+        print(f"[CREW-POOL] Replacing worker {worker.process.pid}: {reason}")
+        await asyncio.to_thread(worker.stop)
+        new_worker = await asyncio.to_thread(CrewWorker)
+        self._workers = [w for w in self._workers if w is not worker] + [new_worker]
+        return new_worker
+
+    async def run(self, job: dict, on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Run a crew job using the next idle worker. `on_event` is called from a worker
+        thread, not the event loop.
+        """
+        if self._idle is None:
+            await self.start()
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+        started_at = time.monotonic()
+        self._wait_times.append(started_at - queued_at)
+        self.busy += 1
+        try:
+            if not worker.is_alive():
+                worker = await self._replace(worker, "process exited")
+            result = await asyncio.wait_for(
+                asyncio.to_thread(worker.run, job, on_event),
+                timeout=self.job_timeout
+            )
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            # Runaway crew: kill the process, the finally block replaces it
+            worker.kill()
+            self.timed_out += 1
+            raise CrewWorkerError(f"Crew job timed out after {self.job_timeout:.0f}s")
+        except asyncio.CancelledError:
+            # The worker is still busy with the abandoned job; don't hand it out again
+            worker.kill()
+            raise
+        except CrewWorkerError:
+            self.failed += 1
+            raise
+        finally:
+            self.busy -= 1
+            self._run_times.append(time.monotonic() - started_at)
+            if not worker.is_alive():
+                worker = await self._replace(worker, "process exited")
+            elif worker.jobs_done >= self.max_jobs:
+                worker = await self._replace(worker, f"served {worker.jobs_done} jobs")
+            self._idle.put_nowait(worker)
+
+    def average_run_time(self) -> Optional[float]:
+        return sum(self._run_times) / len(self._run_times) if self._run_times else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.size,
+            "workers_alive": sum(1 for worker in self._workers if worker.is_alive()),
+            "busy": self.busy,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "job_timeout_seconds": self.job_timeout,
+            "average_wait_seconds": sum(self._wait_times) / len(self._wait_times) if self._wait_times else 0.0,
+            "max_wait_seconds": max(self._wait_times, default=0.0),
+            "average_run_seconds": self.average_run_time() or 0.0,
+        }
+
+
+# Shared pool instance, started on application startup
+crew_pool = CrewWorkerPool()
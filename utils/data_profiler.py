@@ -0,0 +1,310 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_store import read_dataset
+
+# Number of most frequent values kept per categorical column
+PROFILE_TOP_K = 5
+# Number of strongest numeric correlations kept
+PROFILE_TOP_CORRELATIONS = 10
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+def _clean(value: Any) -> Any:
+    """
+    Convert numpy/pandas scalars into JSON and Mongo friendly Python values
+    """
+    if value is None:
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+def profile_dataframe(df: pd.DataFrame, top_k: int = PROFILE_TOP_K) -> Dict[str, Any]:
+    """
+    Compute a compact, deterministic profile of a DataFrame: per-column types, null counts,
+    numeric summaries and quantiles, top-k categories and the strongest correlations
+    """
+    row_count = len(df)
+    null_counts = df.isna().sum()
+    unique_counts = df.nunique(dropna=True)
+
+    numeric = df.select_dtypes(include="number")
+    datetimes = df.select_dtypes(include="datetime")
+    categorical = df.select_dtypes(exclude=["number", "datetime"])
+
+    # One vectorized pass over all numeric columns
+    numeric_stats = numeric.agg(["min", "max", "mean", "std"]) if not numeric.empty else pd.DataFrame()
+    numeric_quantiles = numeric.quantile(QUANTILES) if not numeric.empty else pd.DataFrame()
+
+    columns = {}
+    for column in df.columns:
+        info = {
+            "dtype": str(df[column].dtype),
+            "null_count": _clean(null_counts[column]),
+            "unique_count": _clean(unique_counts[column]),
+        }
+        if column in numeric.columns:
+            info["kind"] = "numeric"
+            info.update({stat: _clean(numeric_stats.at[stat, column]) for stat in numeric_stats.index})
+            info["quantiles"] = {
+                str(q): _clean(numeric_quantiles.at[q, column]) for q in numeric_quantiles.index
+            }
+        elif column in datetimes.columns:
+            info["kind"] = "datetime"
+            info["min"] = _clean(datetimes[column].min())
+            info["max"] = _clean(datetimes[column].max())
+        else:
+            info["kind"] = "categorical"
+            top_values = categorical[column].value_counts(dropna=True).head(top_k)
+            info["top_values"] = [
+                {"value": str(value), "count": _clean(count)} for value, count in top_values.items()
+            ]
+        columns[str(column)] = info
+
+    return {
+        "row_count": row_count,
+        "column_count": len(df.columns),
+        "columns": columns,
+        "correlations": _top_correlations(numeric),
+    }
+
+
+def _top_correlations(numeric: pd.DataFrame, limit: int = PROFILE_TOP_CORRELATIONS):
+    if numeric.shape[1] < 2:
+        return []
+    corr = numeric.corr()
+    # Keep each pair once (upper triangle, no diagonal)
+    mask = np.triu(np.ones(corr.shape, dtype=bool), k=1)
+    pairs = corr.where(mask).stack()
+    pairs = pairs.reindex(pairs.abs().sort_values(ascending=False).index).head(limit)
+    return [
+        {"columns": [str(a), str(b)], "correlation": _clean(round(value, 4))}
+        for (a, b), value in pairs.items()
+    ]
+
+
+def profile_csv(file_path: str, top_k: int = PROFILE_TOP_K) -> Optional[Dict[str, Any]]:
+    """
+    Profile a CSV file (from its Parquet copy when there is one), returning None if it can't be parsed
+    """
+    try:
+        df = read_dataset(file_path)
+    except Exception as e:
+        print(f"[PROFILE] Could not parse {file_path}: {e}")
+        return None
+    return profile_dataframe(df, top_k=top_k)
+
+
+def format_profile_markdown(profile: Dict[str, Any]) -> str:
+    """
+    Render a profile as compact markdown for the agents
+    """
+    lines = [
+        f"Dataset profile: {profile['row_count']} rows, {profile['column_count']} columns.",
+        "",
+        "| Column | Type | Nulls | Unique | Summary |",
+        "|---|---|---|---|---|",
+    ]
+    for name, info in profile["columns"].items():
+        if info["kind"] == "numeric":
+            quantiles = info.get("quantiles", {})
+            summary = (
+                f"min={info.get('min')}, max={info.get('max')}, mean={_fmt(info.get('mean'))}, "
+                f"std={_fmt(info.get('std'))}, p25={_fmt(quantiles.get('0.25'))}, "
+                f"median={_fmt(quantiles.get('0.5'))}, p75={_fmt(quantiles.get('0.75'))}"
+            )
+        elif info["kind"] == "datetime":
+            summary = f"from {info.get('min')} to {info.get('max')}"
+        else:
+            summary = ", ".join(f"{item['value']} ({item['count']})" for item in info.get("top_values", []))
+        lines.append(f"| {name} | {info['dtype']} | {info['null_count']} | {info['unique_count']} | {summary} |")
+
+    if profile.get("correlations"):
+        lines += ["", "Strongest numeric correlations:"]
+        for pair in profile["correlations"]:
+            lines.append(f"- {pair['columns'][0]} ~ {pair['columns'][1]}: {pair['correlation']}")
+
+    return "\n".join(lines)
+
+
+def _fmt(value: Any) -> Any:
+    return round(value, 4) if isinstance(value, float) else value
+
+
+# Profile statistics that can't be merged exactly from two profiles
+APPROXIMATE_WHEN_MERGED = ["unique_count", "quantiles", "top_values", "correlations"]
+
+
+def _merge_numeric(a: Dict[str, Any], b: Dict[str, Any], n_a: int, n_b: int) -> Dict[str, Any]:
+    """Exact min/max/mean/std (pooled variance); quantiles weighted by non-null counts"""
+    n = n_a + n_b
+    merged = {
+        "min": min(v for v in (a.get("min"), b.get("min")) if v is not None) if n else None,
+        "max": max(v for v in (a.get("max"), b.get("max")) if v is not None) if n else None,
+    }
+    if not n_a or not n_b:
+        source = a if n_a else b
+        merged.update({"mean": source.get("mean"), "std": source.get("std"), "quantiles": source.get("quantiles")})
+        return merged
+
+    mean_a, mean_b = a.get("mean") or 0.0, b.get("mean") or 0.0
+    mean = (n_a * mean_a + n_b * mean_b) / n
+    var_a, var_b = (a.get("std") or 0.0) ** 2, (b.get("std") or 0.0) ** 2
+    sum_squares = (n_a - 1) * var_a + (n_b - 1) * var_b + n_a * n_b / n * (mean_a - mean_b) ** 2
+    merged["mean"] = _clean(mean)
+    merged["std"] = _clean(math.sqrt(sum_squares / (n - 1))) if n > 1 else None
+    merged["quantiles"] = {
+        q: _clean((n_a * (a["quantiles"].get(q) or 0) + n_b * (b["quantiles"].get(q) or 0)) / n)
+        for q in a.get("quantiles", {})
+    }
+    return merged
+
+
+def _merge_top_values(a: list, b: list, top_k: int) -> list:
+    counts: Dict[str, int] = {}
+    for item in a + b:
+        counts[item["value"]] = counts.get(item["value"], 0) + item["count"]
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [{"value": value, "count": count} for value, count in ranked]
+
+
+def merge_profiles(base: Dict[str, Any], appended: Dict[str, Any], top_k: int = PROFILE_TOP_K) -> Optional[Dict[str, Any]]:
+    """
+    Combine the profile of a dataset with the profile of rows appended to it.
+    Counts, min/max, mean and std are exact; the fields in APPROXIMATE_WHEN_MERGED are estimates.
+    Returns None when the column layout or types differ, so the caller can profile from scratch.
+    """
+    if list(base["columns"]) != list(appended["columns"]):
+        return None
+    rows_a, rows_b = base["row_count"], appended["row_count"]
+
+    columns = {}
+    for name, a in base["columns"].items():
+        b = appended["columns"][name]
+        if a["kind"] != b["kind"]:
+            return None
+        info = {
+            "dtype": a["dtype"],
+            "null_count": a["null_count"] + b["null_count"],
+            # Lower bound: values seen in both parts are counted once
+            "unique_count": max(a["unique_count"] or 0, b["unique_count"] or 0),
+            "kind": a["kind"],
+        }
+        if a["kind"] == "numeric":
+            info.update(_merge_numeric(a, b, rows_a - a["null_count"], rows_b - b["null_count"]))
+        elif a["kind"] == "datetime":
+            info["min"] = min((v for v in (a.get("min"), b.get("min")) if v), default=None)
+            info["max"] = max((v for v in (a.get("max"), b.get("max")) if v), default=None)
+        else:
+            info["top_values"] = _merge_top_values(a.get("top_values", []), b.get("top_values", []), top_k)
+        columns[name] = info
+
+    # Correlations of pairs present in both profiles, weighted by row counts
+    appended_pairs = {tuple(pair["columns"]): pair["correlation"] for pair in appended.get("correlations", [])}
+    correlations = []
+    for pair in base.get("correlations", []):
+        other = appended_pairs.get(tuple(pair["columns"]))
+        if pair["correlation"] is None or other is None:
+            continue
+        value = (rows_a * pair["correlation"] + rows_b * other) / (rows_a + rows_b)
+        correlations.append({"columns": pair["columns"], "correlation": _clean(round(value, 4))})
+
+    return {
+        "row_count": rows_a + rows_b,
+        "column_count": base["column_count"],
+        "columns": columns,
+        "correlations": correlations,
+        "approximate": APPROXIMATE_WHEN_MERGED,
+    }
+
+
+def profile_delta(previous: Dict[str, Any], appended: Dict[str, Any], merged: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What the appended rows changed: row growth, how numeric columns of the new rows compare
+    with the previous data, new frequent categories and extended date ranges
+    """
+    numeric, categories, dates = {}, {}, {}
+    for name, before in previous["columns"].items():
+        new = appended["columns"][name]
+        if before["kind"] == "numeric":
+            change = None
+            if before.get("mean") and new.get("mean") is not None:
+                change = round((new["mean"] - before["mean"]) / abs(before["mean"]) * 100, 2)
+            numeric[name] = {
+                "previous_mean": _fmt(before.get("mean")),
+                "new_rows_mean": _fmt(new.get("mean")),
+                "mean_change_pct": change,
+                "new_rows_min": new.get("min"),
+                "new_rows_max": new.get("max"),
+                "new_rows_nulls": new["null_count"],
+            }
+        elif before["kind"] == "categorical":
+            known = {item["value"] for item in before.get("top_values", [])}
+            fresh = [item for item in new.get("top_values", []) if item["value"] not in known]
+            if fresh:
+                categories[name] = fresh
+        if before.get("max") != merged["columns"][name].get("max") and before["kind"] == "datetime":
+            dates[name] = {"previous_max": before.get("max"), "new_max": merged["columns"][name].get("max")}
+
+    return {
+        "previous_rows": previous["row_count"],
+        "new_rows": appended["row_count"],
+        "total_rows": merged["row_count"],
+        "numeric": numeric,
+        "new_top_categories": categories,
+        "extended_dates": dates,
+    }
+
+
+def format_delta_markdown(delta: Dict[str, Any]) -> str:
+    """
+    Render a profile delta as compact markdown for the agents
+    """
+    lines = [
+        f"What changed: {delta['new_rows']} rows were appended to the {delta['previous_rows']} "
+        f"previously analysed rows ({delta['total_rows']} in total).",
+    ]
+    if delta["numeric"]:
+        lines += [
+            "",
+            "| Column | Previous mean | New rows mean | Change % | New rows min | New rows max |",
+            "|---|---|---|---|---|---|",
+        ]
+        for name, info in delta["numeric"].items():
+            lines.append(
+                f"| {name} | {info['previous_mean']} | {info['new_rows_mean']} | {info['mean_change_pct']} "
+                f"| {info['new_rows_min']} | {info['new_rows_max']} |"
+            )
+    if delta["new_top_categories"]:
+        lines += ["", "Frequent values in the new rows that were not frequent before:"]
+        for name, items in delta["new_top_categories"].items():
+            lines.append(f"- {name}: " + ", ".join(f"{item['value']} ({item['count']})" for item in items))
+    if delta["extended_dates"]:
+        lines += ["", "Date ranges extended by the new rows:"]
+        for name, info in delta["extended_dates"].items():
+            lines.append(f"- {name}: previously up to {info['previous_max']}, now up to {info['new_max']}")
+    return "\n".join(lines)
+
+
+def format_tabs_markdown(tabs: List[Dict[str, Any]]) -> str:
+    """
+    Render the per-tab profiles of a multi-tab sheet as compact markdown for the agents
+    """
+    lines = [
+        f"The dataset combines {len(tabs)} tabs of one spreadsheet; the `__tab__` column "
+        "names the tab each row comes from.",
+    ]
+    for tab in tabs:
+        lines += ["", f"### Tab '{tab['name']}' ({tab['rows']} rows)"]
+        if tab.get("profile"):
+            lines.append(format_profile_markdown(tab["profile"]))
+    return "\n".join(lines)
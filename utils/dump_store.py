@@ -0,0 +1,331 @@
+import os
+import time
+import uuid
+import asyncio
+import pathlib
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from models.reportModel import Report
+from utils.s3upload import create_sheet_dump_directory
+from utils.executors import run_io
+
+# Identical datasets share one file on disk (hardlinks to a content-addressed blob)
+SHEET_DUMP_DEDUP = os.getenv("SHEET_DUMP_DEDUP", "true").lower() == "true"
+# Files of reports not updated for this many hours are evicted (0 disables)
+SHEET_DUMP_TTL_HOURS = float(os.getenv("SHEET_DUMP_TTL_HOURS", "168"))
+# Disk budget for sheet_dump; least recently used datasets are evicted above it (0 disables)
+SHEET_DUMP_QUOTA_MB = float(os.getenv("SHEET_DUMP_QUOTA_MB", "2048"))
+SHEET_DUMP_SWEEP_MINUTES = float(os.getenv("SHEET_DUMP_SWEEP_MINUTES", "30"))
+# Files without a report are kept this long, so uploads still being ingested survive a sweep
+SHEET_DUMP_ORPHAN_GRACE_MINUTES = float(os.getenv("SHEET_DUMP_ORPHAN_GRACE_MINUTES", "60"))
+
+BLOB_DIR_NAME = ".blobs"
+
+
+def _physical_bytes(stats: List[os.stat_result]) -> int:
+    return sum({(st.st_dev, st.st_ino): st.st_size for st in stats}.values())
+
+
+class SheetDumpManager:
+    """
+    Lifecycle of the files in sheet_dump. Every ingested dataset is a UUID-named CSV
+    plus derived files with the same stem (.parquet, .sample.csv, .delta.csv,
+    .delta.parquet). Identical CSVs are hardlinked to one blob in sheet_dump/.blobs,
+    so the inode link count is the blob's refcount. A periodic sweep evicts datasets
+    whose report is gone or older than the TTL, then the least recently used ones
+    until the directory fits in the quota.
+    """
+
+    def __init__(self, ttl_hours: float = SHEET_DUMP_TTL_HOURS, quota_mb: float = SHEET_DUMP_QUOTA_MB,
+                 sweep_minutes: float = SHEET_DUMP_SWEEP_MINUTES):
+        self.ttl_hours = ttl_hours
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.sweep_interval = sweep_minutes * 60
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Blobs kept after their last dataset was released, by name, with the release time
+        self._retained: Dict[str, float] = {}
+        self.deduplicated = 0
+        self.deduplicated_bytes = 0
+        self.evicted = defaultdict(int)
+        self.evicted_bytes = 0
+        self.sweeps = 0
+        self.last_sweep: Optional[Dict[str, Any]] = None
+
+    @property
+    def root(self) -> pathlib.Path:
+        return create_sheet_dump_directory()
+
+    @property
+    def blob_dir(self) -> pathlib.Path:
+        blob_dir = self.root / BLOB_DIR_NAME
+        blob_dir.mkdir(exist_ok=True)
+        return blob_dir
+
+    def _blob_path(self, data_hash: str, suffix: str) -> pathlib.Path:
+        return self.blob_dir / f"{data_hash}{suffix}"
+
+    def deduplicate(self, file_path: str, data_hash: str) -> bool:
+        """
+        Replace an ingested file with a hardlink to the blob of identical content, or
+        register it as that blob. Returns True if an existing copy was reused.
+        """
+        if not SHEET_DUMP_DEDUP or not data_hash:
+            return False
+        path = pathlib.Path(file_path)
+        parquet = path.with_suffix(".parquet")
+        blob = self._blob_path(data_hash, path.suffix.lower())
+        blob_parquet = self._blob_path(data_hash, ".parquet")
+        reused = False
+        try:
+            with self._lock:
+                if blob.exists():
+                    if not os.path.samefile(blob, path):
+                        size = path.stat().st_size
+                        # Swap in the link atomically; readers never see a missing file
+                        tmp = path.with_name(f"{path.name}.link")
+                        os.link(blob, tmp)
+                        os.replace(tmp, path)
+                        self.deduplicated += 1
+                        self.deduplicated_bytes += size
+                        reused = True
+                else:
+                    os.link(path, blob)
+                # Share the Parquet copy too, whichever side has one
+                if blob_parquet.exists() and not parquet.exists():
+                    os.link(blob_parquet, parquet)
+                elif parquet.exists() and not blob_parquet.exists():
+                    os.link(parquet, blob_parquet)
+        except OSError as e:
+            print(f"[SHEET-DUMP] Could not deduplicate {file_path}: {e}")
+            return False
+        if reused:
+            print(f"[SHEET-DUMP] {path.name} shares its content with blob {data_hash[:12]}")
+        return reused
+
+    def has_blob(self, data_hash: str, suffix: str = ".csv") -> bool:
+        return SHEET_DUMP_DEDUP and self._blob_path(data_hash, suffix).exists()
+
+    def link_blob(self, data_hash: str, suffix: str = ".csv") -> Optional[str]:
+        """
+        New dataset in sheet_dump holding the blob's content (and its Parquet copy, if any),
+        without copying it. Returns the file path, or None if the blob has been evicted.
+        """
+        blob = self._blob_path(data_hash, suffix)
+        blob_parquet = self._blob_path(data_hash, ".parquet")
+        path = self.root / f"{uuid.uuid4()}{suffix}"
+        try:
+            with self._lock:
+                os.link(blob, path)
+                if blob_parquet.exists():
+                    os.link(blob_parquet, path.with_suffix(".parquet"))
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def dataset_files(self, file_path: str) -> List[pathlib.Path]:
+        """The ingested file and every file derived from it"""
+        path = pathlib.Path(file_path)
+        stem = path.name.split(".")[0]
+        return sorted(p for p in path.parent.glob(f"{stem}.*") if p.is_file())
+
+    def release(self, file_path: Optional[str], keep_blobs: bool = False) -> int:
+        """
+        Delete a dataset's files, and blobs nothing links to anymore. With `keep_blobs`
+        those blobs stay until the orphan grace has passed, for intermediate files whose
+        content may be revalidated soon (the tabs of a multi-tab sheet). Returns the bytes freed.
+        """
+        if not file_path:
+            return 0
+        freed = 0
+        with self._lock:
+            for path in self.dataset_files(file_path):
+                if keep_blobs:
+                    blob = self._linked_blob(path)
+                    if blob:
+                        self._retained[blob] = time.time()
+                freed += self._unlink(path)
+            freed += self._prune_blobs()
+        return freed
+
+    def _linked_blob(self, path: pathlib.Path) -> Optional[str]:
+        """Name of the blob a dataset file is hardlinked to, if any"""
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        if st.st_nlink < 2:
+            return None
+        return next(
+            (blob.name for blob in self.blob_dir.glob(f"*{path.suffix}")
+             if blob.stat().st_ino == st.st_ino and blob.stat().st_dev == st.st_dev),
+            None
+        )
+
+    def _unlink(self, path: pathlib.Path) -> int:
+        """Remove one link; returns the bytes freed, counting a blob left without other links"""
+        try:
+            st = path.stat()
+            path.unlink()
+        except FileNotFoundError:
+            return 0
+        return st.st_size if st.st_nlink == 1 else 0
+
+    def _prune_blobs(self, keep_retained: bool = True) -> int:
+        """Remove blobs without links, except those retained by release(keep_blobs=True)"""
+        freed = 0
+        now = time.time()
+        grace = SHEET_DUMP_ORPHAN_GRACE_MINUTES * 60
+        self._retained = {name: at for name, at in self._retained.items() if now - at < grace}
+        for blob in self.blob_dir.iterdir():
+            if keep_retained and blob.name in self._retained:
+                continue
+            try:
+                st = blob.stat()
+            except FileNotFoundError:
+                continue
+            if st.st_nlink == 1:
+                blob.unlink()
+                freed += st.st_size
+        return freed
+
+    def _scan(self) -> Dict[str, List[pathlib.Path]]:
+        """Datasets in sheet_dump, grouped by file stem"""
+        datasets = defaultdict(list)
+        for path in self.root.iterdir():
+            if path.is_file() and not path.name.startswith("."):
+                datasets[path.name.split(".")[0]].append(path)
+        return datasets
+
+    async def sweep(self) -> Dict[str, Any]:
+        """Evict orphaned and expired datasets, then enforce the quota (least recently used first)"""
+        started = time.perf_counter()
+        datasets = await run_io(self._scan)
+        paths = [str(path) for files in datasets.values() for path in files]
+        reports = await Report.find_file_path_usage(paths) if paths else {}
+        result = await run_io(self._evict, datasets, reports)
+        result["duration"] = round(time.perf_counter() - started, 3)
+        result["finished_at"] = datetime.utcnow().isoformat()
+        self.sweeps += 1
+        self.last_sweep = result
+        if result["evicted"]:
+            print(f"[SHEET-DUMP] Evicted {result['evicted']} dataset(s), {result['freed_bytes']} bytes: {result['reasons']}")
+        return result
+
+    def _evict(self, datasets: Dict[str, List[pathlib.Path]], reports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        now = time.time()
+        grace = SHEET_DUMP_ORPHAN_GRACE_MINUTES * 60
+        ttl = self.ttl_hours * 3600
+        reasons = defaultdict(int)
+        freed = 0
+        candidates = []
+
+        with self._lock:
+            for stem, files in datasets.items():
+                try:
+                    stats = [path.stat() for path in files]
+                except FileNotFoundError:
+                    continue
+                # ctime moves with every new link, so a freshly deduplicated file counts as new
+                touched = max(max(st.st_mtime, st.st_ctime) for st in stats)
+                report = next((reports[str(path)] for path in files if str(path) in reports), None)
+                if report and report.get("status") == "processing":
+                    continue
+                if report is None:
+                    reason = "orphaned" if now - touched > grace else None
+                else:
+                    # Hardlinked files share timestamps; the report says when this dataset was last used
+                    if report.get("updated_at"):
+                        touched = report["updated_at"].replace(tzinfo=timezone.utc).timestamp()
+                    reason = "expired" if ttl > 0 and now - touched > ttl else None
+                if reason:
+                    freed += sum(self._unlink(path) for path in files)
+                    reasons[reason] += 1
+                else:
+                    candidates.append((touched, files))
+            freed += self._prune_blobs()
+
+            if self.quota_bytes > 0:
+                usage = self._usage()["physical_bytes"]
+                for _, files in sorted(candidates, key=lambda c: c[0]):
+                    if usage <= self.quota_bytes:
+                        break
+                    released = sum(self._unlink(path) for path in files) + self._prune_blobs(keep_retained=False)
+                    usage -= released
+                    freed += released
+                    reasons["quota"] += 1
+
+        for reason, count in reasons.items():
+            self.evicted[reason] += count
+        self.evicted_bytes += freed
+        return {"evicted": sum(reasons.values()), "reasons": dict(reasons), "freed_bytes": freed}
+
+    def _usage(self) -> Dict[str, Any]:
+        datasets = self._scan()
+        stats = []
+        for files in datasets.values():
+            for path in files:
+                try:
+                    stats.append(path.stat())
+                except FileNotFoundError:
+                    pass
+        blob_stats = [blob.stat() for blob in self.blob_dir.iterdir()]
+        logical = sum(st.st_size for st in stats)
+        physical = _physical_bytes(stats + blob_stats)
+        return {
+            "datasets": len(datasets),
+            "files": len(stats),
+            "blobs": len(blob_stats),
+            "logical_bytes": logical,
+            "physical_bytes": physical,
+            "dedup_saved_bytes": max(0, logical - physical),
+        }
+
+    async def stats(self) -> Dict[str, Any]:
+        usage = await run_io(self._usage)
+        return {
+            **usage,
+            "quota_bytes": self.quota_bytes,
+            "quota_used": round(usage["physical_bytes"] / self.quota_bytes, 4) if self.quota_bytes else None,
+            "ttl_hours": self.ttl_hours,
+            "dedup_enabled": SHEET_DUMP_DEDUP,
+            "deduplicated_uploads": self.deduplicated,
+            "deduplicated_bytes": self.deduplicated_bytes,
+            "evicted": dict(self.evicted),
+            "evicted_bytes": self.evicted_bytes,
+            "sweeps": self.sweeps,
+            "sweep_interval_seconds": self.sweep_interval,
+            "last_sweep": self.last_sweep,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[SHEET-DUMP] Sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self):
+        """Start the background sweeper (a no-op if it is disabled or already running)"""
+        if self.sweep_interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        print(f"[SHEET-DUMP] Sweeping every {self.sweep_interval:.0f}s")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+dump_manager = SheetDumpManager()
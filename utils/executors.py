@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Blocking work called from async handlers runs in one of two bounded pools:
+# IO (network, disk, SMTP, database) and CPU (parsing, hashing, profiling).
+IO_POOL_WORKERS = int(os.getenv("IO_POOL_WORKERS", "32"))
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(max(2, os.cpu_count() or 1))))
+STATS_WINDOW = 200
+
+
+class MonitoredExecutor:
+    """
+    Thread pool that counts its tasks and how long they wait and run. The CPU pool is
+    threads too: pandas, pyarrow and bcrypt release the GIL in their heavy parts, and
+    DataFrames can't cross a process boundary cheaply. Bounding it to the core count
+    keeps CPU work from crowding out IO.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._wait_times = deque(maxlen=STATS_WINDOW)
+        self._run_times = deque(maxlen=STATS_WINDOW)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool"
+                    )
+        return self._executor
+
+    def _track(self, func: Callable, submitted_at: float):
+        started = time.monotonic()
+        with self._lock:
+            self.active += 1
+            self._wait_times.append(started - submitted_at)
+        failed = False
+        try:
+            return func()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.active -= 1
+                self.busy_seconds += elapsed
+                self._run_times.append(elapsed)
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run `func(*args, **kwargs)` in the pool, with the caller's context variables"""
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        with self._lock:
+            self.submitted += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(self._track, call, time.monotonic())
+        )
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = time.monotonic() - self.started_at
+            wait_times, run_times = list(self._wait_times), list(self._run_times)
+            active = self.active
+            return {
+                "max_workers": self.max_workers,
+                "active": active,
+                "queued": max(0, self.submitted - self.completed - self.failed - active),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "utilization": round(active / self.max_workers, 4),
+                # Share of the pool's capacity spent running tasks since start
+                "busy_ratio": round(self.busy_seconds / (uptime * self.max_workers), 4) if uptime else 0.0,
+                "average_wait_seconds": round(sum(wait_times) / len(wait_times), 4) if wait_times else 0.0,
+                "max_wait_seconds": round(max(wait_times, default=0.0), 4),
+                "average_run_seconds": round(sum(run_times) / len(run_times), 4) if run_times else 0.0,
+            }
+
+
+io_executor = MonitoredExecutor("io", IO_POOL_WORKERS)
+cpu_executor = MonitoredExecutor("cpu", CPU_POOL_WORKERS)
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """Run blocking IO (network, disk, database, SMTP) off the event loop"""
+    return await io_executor.run(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """Run CPU-bound work (parsing, hashing, profiling) off the event loop"""
+    return await cpu_executor.run(func, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Any]:
+    return {"io": io_executor.stats(), "cpu": cpu_executor.stats()}
+
+
+def shutdown_executors():
+    io_executor.shutdown()
+    cpu_executor.shutdown()
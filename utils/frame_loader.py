@@ -0,0 +1,144 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype
+)
+from pandas.tseries.api import guess_datetime_format
+
+# Shrink DataFrames loaded from Google Sheets and PostgreSQL before they are stored
+COMPACT_DTYPES = os.getenv("COMPACT_DTYPES", "true").lower() == "true"
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+
+# pandas 3 already reads text as Arrow-backed "str"; pandas 2 needs it asked for
+ARROW_STRING_DTYPE = "str" if int(pd.__version__.split(".")[0]) >= 3 else "string[pyarrow]"
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _parse_dates(series: pd.Series, non_null: int) -> Optional[pd.Series]:
+    """The column as datetimes if every value matches the format of the first one"""
+    first = series.dropna().iloc[0]
+    if not isinstance(first, str):
+        return None
+    date_format = guess_datetime_format(first.strip())
+    # Times of day alone ("10:30") would gain a made-up date
+    if date_format is None or ("%Y" not in date_format and "%y" not in date_format):
+        return None
+    parsed = pd.to_datetime(series, format=date_format, errors="coerce")
+    # Only lossless conversions: a single unparseable value keeps the column as text
+    return parsed if parsed.notna().sum() == non_null else None
+
+
+def _downcast_float(series: pd.Series) -> pd.Series:
+    """float32 when it holds every value exactly, otherwise the column unchanged"""
+    if series.dtype != np.float64:
+        return series
+    narrowed = series.astype(np.float32)
+    exact = (narrowed.astype(np.float64) == series) | series.isna()
+    return narrowed if exact.all() else series
+
+
+def _compact_column(series: pd.Series) -> pd.Series:
+    if is_bool_dtype(series.dtype) or is_datetime64_any_dtype(series.dtype):
+        return series
+    if is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+    if is_float_dtype(series.dtype):
+        return _downcast_float(series)
+    if isinstance(series.dtype, pd.CategoricalDtype) or not _is_text(series):
+        return series
+
+    non_null = int(series.notna().sum())
+    if non_null == 0:
+        return series
+    dates = _parse_dates(series, non_null)
+    if dates is not None:
+        return dates
+
+    # Pick the smaller of categorical and Arrow string storage
+    candidates = [series.astype(ARROW_STRING_DTYPE)] if series.dtype == object else [series]
+    if series.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE_RATIO * non_null:
+        candidates.append(series.astype("category"))
+    return min(candidates, key=lambda s: s.memory_usage(deep=True, index=False))
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def memory_report(before: int, after: int, rows: int, conversions: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "rows": rows,
+        "bytes_before": before,
+        "bytes_after": after,
+        "bytes_saved": before - after,
+        "saved_ratio": round(1 - after / before, 4) if before else 0.0,
+        "conversions": conversions,
+    }
+
+
+def optimize_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Infer a compact schema: parsed dates, categoricals for low-cardinality text, Arrow
+    strings for the rest and downcast numerics. Values are unchanged. Returns the frame
+    and a report of the memory before and after and of each converted column.
+    """
+    before = memory_bytes(df)
+    if not COMPACT_DTYPES or df.empty:
+        return df, memory_report(before, before, len(df), {})
+
+    columns, conversions = {}, {}
+    for column in df.columns:
+        compact = _compact_column(df[column])
+        if compact.dtype != df[column].dtype:
+            conversions[str(column)] = f"{df[column].dtype} -> {compact.dtype}"
+        columns[column] = compact
+    df = pd.DataFrame(columns, index=df.index)
+    return df, memory_report(before, memory_bytes(df), len(df), conversions)
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate compacted frames. Categorical columns get the union of their categories
+    first, since pandas falls back to object columns when the categories differ; columns
+    that still end up as object (e.g. categorical in one frame, text in another) are
+    compacted again.
+    """
+    frames = list(frames)
+    shared = set.intersection(*(set(frame.columns) for frame in frames)) if frames else set()
+    for column in shared:
+        dtypes = [frame[column].dtype for frame in frames]
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            continue
+        categories = pd.Index(
+            pd.unique(np.concatenate([np.asarray(dtype.categories, dtype=object) for dtype in dtypes]))
+        )
+        frames = [
+            frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames
+        ]
+    combined = pd.concat(frames, ignore_index=True)
+    if COMPACT_DTYPES:
+        for column in combined.columns[combined.dtypes == object]:
+            combined[column] = _compact_column(combined[column])
+    return combined
+
+
+def read_csv_compact(source, **kwargs) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """pd.read_csv (path or URL) followed by optimize_dataframe"""
+    return optimize_dataframe(pd.read_csv(source, **kwargs))
+
+
+def combine_memory_reports(reports: List[Dict[str, Any]], combined: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Memory report over several loaded frames, measured on `combined` when given"""
+    before = sum(report["bytes_before"] for report in reports)
+    after = memory_bytes(combined) if combined is not None else sum(report["bytes_after"] for report in reports)
+    conversions = {}
+    for report in reports:
+        conversions.update(report["conversions"])
+    return memory_report(before, after, sum(report["rows"] for report in reports), conversions)
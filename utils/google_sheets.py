@@ -0,0 +1,294 @@
+import os
+import re
+import html
+import json
+import time
+import asyncio
+import pathlib
+import sqlite3
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import pandas as pd
+
+from utils.s3upload import stream_to_sheet_dump, UPLOAD_CHUNK_SIZE
+from utils.dump_store import dump_manager
+from utils.executors import run_io
+from utils.report_cache import content_hash_for
+
+# Export endpoint; point it at a local stand-in to test without Google
+GOOGLE_SHEETS_BASE_URL = os.getenv("GOOGLE_SHEETS_BASE_URL", "https://docs.google.com").rstrip("/")
+SHEETS_CONNECT_TIMEOUT = float(os.getenv("SHEETS_CONNECT_TIMEOUT", "10"))
+SHEETS_READ_TIMEOUT = float(os.getenv("SHEETS_READ_TIMEOUT", "60"))
+SHEETS_MAX_CONNECTIONS = int(os.getenv("SHEETS_MAX_CONNECTIONS", "20"))
+SHEETS_MAX_BYTES = int(float(os.getenv("SHEETS_MAX_MB", "200")) * 1024 * 1024)
+# ETag/Last-Modified of every fetched tab, so unchanged sheets aren't downloaded again
+SHEETS_CACHE_ENABLED = os.getenv("SHEETS_CACHE_ENABLED", "true").lower() == "true"
+SHEETS_CACHE_PATH = os.getenv(
+    "SHEETS_CACHE_PATH",
+    str(pathlib.Path(__file__).parent.parent / ".cache" / "google_sheets.sqlite3")
+)
+
+# Tabs of one workbook downloaded at the same time, and the most one request may ask for
+SHEETS_TAB_CONCURRENCY = int(os.getenv("SHEETS_TAB_CONCURRENCY", "4"))
+SHEETS_MAX_TABS = int(os.getenv("SHEETS_MAX_TABS", "20"))
+
+SPREADSHEET_ID = re.compile(r'/d/([a-zA-Z0-9-_]+)')
+GID = re.compile(r'gid=([0-9]+)')
+# Tab list of the htmlview page: a script entry per tab, or the tab buttons below the grid
+TAB_ITEM = re.compile(r'name:\s*"((?:[^"\\]|\\.)*)"[^}]*?gid:\s*"(\d+)"')
+TAB_BUTTON = re.compile(r'id="sheet-button-(\d+)"[^>]*>\s*<a[^>]*>(.*?)</a>', re.S)
+
+
+class SheetFetchError(Exception):
+    """A sheet that could not be downloaded; status_code is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_sheet_url(sheet_url: str) -> Tuple[str, str]:
+    """(spreadsheet id, gid) of a Google Sheets URL; the first tab when it names none"""
+    match = SPREADSHEET_ID.search(sheet_url)
+    if not match:
+        raise ValueError("Invalid Google Sheet URL")
+    gid_match = GID.search(sheet_url)
+    return match.group(1), gid_match.group(1) if gid_match else '0'
+
+
+def export_url(spreadsheet_id: str, gid: str) -> str:
+    return f"{GOOGLE_SHEETS_BASE_URL}/spreadsheets/d/{spreadsheet_id}/export?format=csv&gid={gid}"
+
+
+def _js_string(value: str) -> str:
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+
+def parse_sheet_tabs(page: str) -> List[Dict[str, str]]:
+    """[{gid, name}] of every tab listed on a workbook's htmlview page, in workbook order"""
+    tabs = {}
+    for name, gid in TAB_ITEM.findall(page):
+        tabs.setdefault(gid, _js_string(name))
+    if not tabs:
+        for gid, name in TAB_BUTTON.findall(page):
+            tabs.setdefault(gid, html.unescape(re.sub(r'<[^>]+>', '', name)).strip())
+    return [{"gid": gid, "name": name} for gid, name in tabs.items()]
+
+
+def read_sheet_csv(sheet_url: str) -> pd.DataFrame:
+    """Blocking one-off load of a sheet into a DataFrame, for scripts and notebooks"""
+    return pd.read_csv(export_url(*parse_sheet_url(sheet_url)))
+
+
+class SheetValidatorCache:
+    """
+    SQLite-backed validators (ETag, Last-Modified) and data hashes of fetched tabs, keyed
+    on spreadsheet id and gid. The content itself lives in the sheet_dump blob store; the
+    content hash is derived from the data hash on every revalidation.
+    """
+
+    def __init__(self, path: str = SHEETS_CACHE_PATH):
+        self._lock = threading.Lock()
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheets ("
+            "spreadsheet_id TEXT, gid TEXT, etag TEXT, last_modified TEXT, data_hash TEXT, "
+            "data_bytes INTEGER, schema_fingerprint TEXT, record_count INTEGER, "
+            "fetched_at REAL, checked_at REAL, PRIMARY KEY (spreadsheet_id, gid))"
+        )
+
+    def get(self, spreadsheet_id: str, gid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM sheets WHERE spreadsheet_id = ? AND gid = ?", (spreadsheet_id, gid)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+
+    def set(self, spreadsheet_id: str, gid: str, etag: Optional[str], last_modified: Optional[str],
+            hashes: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sheets (spreadsheet_id, gid, etag, last_modified, data_hash, "
+                "data_bytes, schema_fingerprint, record_count, fetched_at, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (spreadsheet_id, gid, etag, last_modified, hashes["data_hash"],
+                 hashes["data_bytes"], hashes["schema_fingerprint"], hashes["record_count"], now, now)
+            )
+
+    def touch(self, spreadsheet_id: str, gid: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sheets SET checked_at = ? WHERE spreadsheet_id = ? AND gid = ?",
+                (time.time(), spreadsheet_id, gid)
+            )
+
+
+_client: Optional[httpx.AsyncClient] = None
+_validator_cache: Optional[SheetValidatorCache] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client: keeps connections to the export host alive across fetches"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(SHEETS_READ_TIMEOUT, connect=SHEETS_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=SHEETS_MAX_CONNECTIONS,
+                max_keepalive_connections=SHEETS_MAX_CONNECTIONS
+            ),
+            # The export URL redirects to the file host
+            follow_redirects=True
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_validator_cache() -> Optional[SheetValidatorCache]:
+    global _validator_cache
+    if SHEETS_CACHE_ENABLED and _validator_cache is None:
+        _validator_cache = SheetValidatorCache()
+    return _validator_cache
+
+
+async def _limited(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise SheetFetchError(f"Sheet is larger than {max_bytes // (1024 * 1024)} MB", status_code=413)
+        yield chunk
+
+
+async def fetch_sheet(spreadsheet_id: str, gid: str = '0') -> Dict[str, Any]:
+    """
+    Download one tab as CSV straight into sheet_dump. A tab fetched before is revalidated
+    with its ETag/Last-Modified; when the server answers 304 the stored copy is linked into
+    a new dataset instead of downloaded. Returns the stream_to_sheet_dump result plus
+    `not_modified`. Raises SheetFetchError on timeouts, HTTP errors and private sheets.
+    """
+    url = export_url(spreadsheet_id, gid)
+    cache = get_validator_cache()
+    entry = await run_io(cache.get, spreadsheet_id, gid) if cache else None
+
+    headers = {}
+    # Revalidating only makes sense while the content is still in the blob store
+    if entry and await run_io(dump_manager.has_blob, entry["data_hash"]):
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        async with get_http_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                file_path = await run_io(dump_manager.link_blob, entry["data_hash"])
+                if file_path:
+                    await run_io(cache.touch, spreadsheet_id, gid)
+                    print(f"[SHEETS] {spreadsheet_id}/{gid} not modified, reusing stored copy")
+                    return {
+                        "file_path": file_path,
+                        "data_bytes": entry["data_bytes"],
+                        "data_hash": entry["data_hash"],
+                        # Derived again, so a crew config change since the last fetch counts
+                        "content_hash": content_hash_for(entry["data_hash"]),
+                        "schema_fingerprint": entry["schema_fingerprint"],
+                        "record_count": entry["record_count"],
+                        "not_modified": True,
+                    }
+                # Evicted in the meantime: fetch it again without validators
+                return await _fetch_fresh(spreadsheet_id, gid)
+            return await _store_response(response, spreadsheet_id, gid, cache)
+    except httpx.TimeoutException as e:
+        raise SheetFetchError(f"Timed out fetching Google Sheet: {e!r}", status_code=504)
+    except httpx.HTTPError as e:
+        raise SheetFetchError(f"Could not fetch Google Sheet: {e}")
+
+
+async def _fetch_fresh(spreadsheet_id: str, gid: str) -> Dict[str, Any]:
+    async with get_http_client().stream("GET", export_url(spreadsheet_id, gid)) as response:
+        return await _store_response(response, spreadsheet_id, gid, get_validator_cache())
+
+
+async def _store_response(response: httpx.Response, spreadsheet_id: str, gid: str,
+                          cache: Optional[SheetValidatorCache]) -> Dict[str, Any]:
+    if response.status_code in (401, 403, 404):
+        raise SheetFetchError("Google Sheet not found or not shared publicly", status_code=400)
+    if response.status_code >= 400:
+        raise SheetFetchError(f"Google Sheets export failed with HTTP {response.status_code}")
+    # Private sheets answer 200 with a sign-in page instead of CSV
+    if "text/html" in response.headers.get("content-type", ""):
+        raise SheetFetchError("Google Sheet is not shared publicly", status_code=400)
+
+    sheet = await stream_to_sheet_dump(
+        _limited(response.aiter_bytes(UPLOAD_CHUNK_SIZE), SHEETS_MAX_BYTES), ".csv"
+    )
+    # Register the content in the blob store, where a later 304 finds it
+    await run_io(dump_manager.deduplicate, sheet["file_path"], sheet["data_hash"])
+    etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+    if cache and (etag or last_modified):
+        await run_io(cache.set, spreadsheet_id, gid, etag, last_modified, sheet)
+    print(f"[SHEETS] Downloaded {spreadsheet_id}/{gid} ({sheet['data_bytes']} bytes)")
+    return {**sheet, "not_modified": False}
+
+
+async def list_sheet_tabs(spreadsheet_id: str) -> List[Dict[str, str]]:
+    """
+    Tabs of a publicly shared workbook ([{gid, name}]), read from its htmlview page since
+    the CSV export has no tab list. Raises SheetFetchError like fetch_sheet.
+    """
+    url = f"{GOOGLE_SHEETS_BASE_URL}/spreadsheets/d/{spreadsheet_id}/htmlview"
+    try:
+        response = await get_http_client().get(url)
+    except httpx.TimeoutException as e:
+        raise SheetFetchError(f"Timed out listing Google Sheet tabs: {e!r}", status_code=504)
+    except httpx.HTTPError as e:
+        raise SheetFetchError(f"Could not list Google Sheet tabs: {e}")
+    if response.status_code in (401, 403, 404):
+        raise SheetFetchError("Google Sheet not found or not shared publicly", status_code=400)
+    if response.status_code >= 400:
+        raise SheetFetchError(f"Listing Google Sheet tabs failed with HTTP {response.status_code}")
+    tabs = parse_sheet_tabs(response.text)
+    if not tabs:
+        # A sign-in page lists no tabs
+        raise SheetFetchError("Could not list the tabs of the Google Sheet; is it shared publicly?", status_code=400)
+    return tabs
+
+
+async def fetch_sheet_tabs(spreadsheet_id: str, gids: List[str]) -> List[Dict[str, Any]]:
+    """
+    fetch_sheet for several tabs of one workbook, at most SHEETS_TAB_CONCURRENCY at a
+    time. Results are in the order of `gids`. If any tab fails, the tabs already stored
+    are released and the first error is raised.
+    """
+    semaphore = asyncio.Semaphore(SHEETS_TAB_CONCURRENCY)
+
+    async def fetch(gid: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch_sheet(spreadsheet_id, gid)
+
+    results = await asyncio.gather(*(fetch(gid) for gid in gids), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        for result in results:
+            if isinstance(result, dict):
+                await run_io(dump_manager.release, result["file_path"], keep_blobs=True)
+        raise errors[0]
+    return results
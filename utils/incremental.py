@@ -0,0 +1,94 @@
+import os
+import glob
+from typing import Any, Dict, Optional, Tuple
+
+from models.reportModel import Report
+from utils.report_cache import compute_file_hashes, fingerprint_header
+from utils.executors import run_io, run_cpu
+
+# Re-analyse only the appended rows when an upload extends an earlier dataset
+INCREMENTAL_ANALYSIS = os.getenv("INCREMENTAL_ANALYSIS", "true").lower() == "true"
+# Earlier reports checked as possible bases for an append
+APPEND_CANDIDATES = 5
+
+
+def read_schema_fingerprint(file_path: str) -> Optional[str]:
+    """Hash of the header row; files with the same columns in the same order share it"""
+    with open(file_path, "rb") as f:
+        return fingerprint_header(f.readline())
+
+
+def _continues_at(file_path: str, offset: int) -> bool:
+    """True if the bytes at `offset` start a new row rather than extend the last one"""
+    with open(file_path, "rb") as f:
+        f.seek(offset - 1)
+        around = f.read(2)
+    return around[:1] == b"\n" or around[1:2] in (b"\n", b"\r")
+
+
+async def fingerprint_upload(file_path: str, user_id: Optional[str],
+                             known: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Optional[Report]]:
+    """
+    Hash an ingested file and look for an earlier report of the same user whose dataset
+    is a byte prefix of this one (same header, more rows appended). Prefix hashes for all
+    candidates are computed in the same pass as the content hash.
+    `known` hashes (computed while the file was written) spare that pass when there
+    are no candidates. Returns (hashes, base report or None).
+    """
+    if known:
+        schema_fingerprint, size = known["schema_fingerprint"], known["data_bytes"]
+    else:
+        schema_fingerprint = await run_io(read_schema_fingerprint, file_path)
+        size = os.path.getsize(file_path)
+
+    candidates = []
+    if INCREMENTAL_ANALYSIS and user_id and schema_fingerprint:
+        candidates = [
+            report for report in await Report.find_append_candidates(
+                user_id, schema_fingerprint, size, limit=APPEND_CANDIDATES
+            )
+            if report.data_hash and report.data_bytes and report.data_profile
+        ]
+
+    if known and not candidates:
+        return {**known, "prefix_hashes": {}}, None
+
+    hashes = await run_cpu(
+        compute_file_hashes, file_path, [report.data_bytes for report in candidates]
+    )
+    hashes["schema_fingerprint"] = schema_fingerprint
+
+    # Prefer the largest matching prefix: the most recent version of the export
+    for report in sorted(candidates, key=lambda r: r.data_bytes, reverse=True):
+        if hashes["prefix_hashes"].get(report.data_bytes) != report.data_hash:
+            continue
+        if await run_io(_continues_at, file_path, report.data_bytes):
+            return hashes, report
+    return hashes, None
+
+
+def write_appended_rows(file_path: str, offset: int) -> str:
+    """
+    Write the header plus the rows after `offset` to a sibling file and return its path
+    """
+    delta_path = f"{os.path.splitext(file_path)[0]}.delta.csv"
+    with open(file_path, "rb") as source, open(delta_path, "wb") as target:
+        header = source.readline()
+        target.write(header if header.endswith(b"\n") else header + b"\n")
+        source.seek(offset)
+        rest = source.read(1024 * 1024)
+        # A base file without a trailing newline leaves one at the start of the new bytes
+        rest = rest.lstrip(b"\r\n")
+        while rest:
+            target.write(rest)
+            rest = source.read(1024 * 1024)
+    return delta_path
+
+
+def remove_appended_rows(delta_path: str):
+    """Delete a file written by write_appended_rows and the files derived from it (Parquet, sample)"""
+    for path in glob.glob(f"{glob.escape(os.path.splitext(delta_path)[0])}.*"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
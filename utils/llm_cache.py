@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import pathlib
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+# LLM response cache configuration
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    str(pathlib.Path(__file__).parent.parent / ".cache" / "llm_cache.sqlite3")
+)
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed store of LLM responses with TTL expiry and size-bounded LRU eviction.
+    Safe to share between threads and between crew worker processes.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 ttl_seconds: float = LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, "
+            "created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        # Hit/miss counters live in the database so every worker process adds to the same totals
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    @staticmethod
+    def make_key(model: str, messages: Any, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Key on the model, its sampling parameters and the full message list. Tool outputs
+        are part of the messages, so a changed tool result is a different key.
+        """
+        payload = json.dumps(
+            {"model": model, "params": params or {}, "messages": messages},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, amount: int = 1):
+        self._conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds):
+                self._count("misses")
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            return row[0]
+
+    def set(self, key: str, model: str, response: str):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until under the size limit"""
+        evicted = 0
+        if self.ttl_seconds > 0:
+            evicted += self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            keys = []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                keys.append(key)
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+            evicted += len(keys)
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "evictions": counters["evictions"],
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide cache instance"""
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
@@ -0,0 +1,139 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+# Approximate USD prices per million (prompt, completion) tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+# Overrides for models missing from the table (or negotiated prices)
+LLM_PROMPT_COST_PER_1M = os.getenv("LLM_PROMPT_COST_PER_1M")
+LLM_COMPLETION_COST_PER_1M = os.getenv("LLM_COMPLETION_COST_PER_1M")
+
+
+def model_prices(model: Optional[str]) -> Optional[Tuple[float, float]]:
+    if LLM_PROMPT_COST_PER_1M is not None and LLM_COMPLETION_COST_PER_1M is not None:
+        return float(LLM_PROMPT_COST_PER_1M), float(LLM_COMPLETION_COST_PER_1M)
+    name = (model or "").split("/")[-1]
+    # Longest prefix first so "gpt-4o-mini-2024-07-18" doesn't match "gpt-4o"
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MODEL_PRICES[prefix]
+    return None
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """USD cost of a call, or None when the model's price is unknown"""
+    prices = model_prices(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _new_task_usage() -> Dict[str, Any]:
+    return {
+        "llm_calls": 0,
+        "llm_failures": 0,
+        "llm_time": 0.0,
+        "cache_hits": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost_usd": 0.0,
+        "tool_calls": 0,
+        "tool_time": 0.0,
+        "tools": {},
+    }
+
+
+class UsageRecorder:
+    """
+    Aggregates LLM calls, token counts, cost and tool invocations per task for the crew
+    running in this process. Fed from crewai event handlers, which run on a thread pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._tasks: Dict[str, Dict[str, Any]] = defaultdict(_new_task_usage)
+            self._call_started: Dict[str, Any] = {}
+            self._models = set()
+            self._unpriced = False
+
+    def llm_started(self, call_id: str, timestamp):
+        with self._lock:
+            self._call_started[call_id] = timestamp
+
+    def llm_completed(self, task: Optional[str], model: Optional[str], call_id: str, timestamp,
+                      usage: Optional[Dict[str, Any]]):
+        usage = usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or usage.get("input_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or usage.get("output_tokens") or 0)
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            entry = self._tasks[task or "unassigned"]
+            entry["llm_calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            started = self._call_started.pop(call_id, None)
+            if started is not None:
+                entry["llm_time"] += (timestamp - started).total_seconds()
+            if cost is None:
+                self._unpriced = True
+            else:
+                entry["cost_usd"] += cost
+            if model:
+                self._models.add(model)
+
+    def llm_failed(self, task: Optional[str], call_id: str):
+        with self._lock:
+            self._call_started.pop(call_id, None)
+            self._tasks[task or "unassigned"]["llm_failures"] += 1
+
+    def cache_hit(self, task: Optional[str]):
+        with self._lock:
+            self._tasks[task or "unassigned"]["cache_hits"] += 1
+
+    def tool_finished(self, task: Optional[str], tool: str, seconds: float):
+        with self._lock:
+            entry = self._tasks[task or "unassigned"]
+            entry["tool_calls"] += 1
+            entry["tool_time"] += seconds
+            tool_entry = entry["tools"].setdefault(tool, {"calls": 0, "time": 0.0})
+            tool_entry["calls"] += 1
+            tool_entry["time"] = round(tool_entry["time"] + seconds, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-task usage plus crew-wide totals (rounded, JSON and Mongo friendly)"""
+        with self._lock:
+            tasks = {}
+            for name, entry in self._tasks.items():
+                tasks[name] = {
+                    **entry,
+                    "llm_time": round(entry["llm_time"], 3),
+                    "tool_time": round(entry["tool_time"], 3),
+                    "cost_usd": round(entry["cost_usd"], 6),
+                }
+            totals = {
+                key: sum(entry[key] for entry in tasks.values())
+                for key in ("llm_calls", "llm_failures", "cache_hits", "prompt_tokens",
+                            "completion_tokens", "tool_calls")
+            }
+            totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+            totals["llm_time"] = round(sum(entry["llm_time"] for entry in tasks.values()), 3)
+            totals["tool_time"] = round(sum(entry["tool_time"] for entry in tasks.values()), 3)
+            # Cost is a lower bound when some model had no known price
+            totals["cost_usd"] = round(sum(entry["cost_usd"] for entry in tasks.values()), 6)
+            totals["cost_complete"] = not self._unpriced
+            return {"tasks": tasks, "totals": totals, "models": sorted(self._models)}
+
+
+# One crew job runs at a time per worker process
+usage_recorder = UsageRecorder()
@@ -1,13 +1,228 @@
-import pandas as pd
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.engine import Engine
-from typing import List, Dict
+import io
+import os
+import csv
+import time
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from sqlalchemy import create_engine, inspect, exc
+from sqlalchemy.engine import Engine, URL
+from sqlalchemy.types import Boolean
+from sqlalchemy.pool import QueuePool
+from typing import Any, List, Dict, Optional
+
+# Engines (and their connection pools) are reused across requests for the same database
+POSTGRES_ENGINE_CACHE_SIZE = int(os.getenv("POSTGRES_ENGINE_CACHE_SIZE", "16"))
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "5"))
+POSTGRES_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", "10"))
+POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))
+# Reconnect before the server (or a proxy) drops idle connections
+POSTGRES_POOL_RECYCLE = int(os.getenv("POSTGRES_POOL_RECYCLE", "1800"))
+POSTGRES_POOL_PRE_PING = os.getenv("POSTGRES_POOL_PRE_PING", "true").lower() == "true"
+# Rows extracted per table by /postgres/analyze, and the most a request may ask for (0 = no cap)
+POSTGRES_ROW_LIMIT = int(os.getenv("POSTGRES_ROW_LIMIT", "10000"))
+POSTGRES_MAX_ROW_LIMIT = int(os.getenv("POSTGRES_MAX_ROW_LIMIT", "1000000"))
+# Column naming the source table of each row in a combined extract
+TABLE_COLUMN = "__table__"
+STATS_WINDOW = 200
+
+
+class PoolStats:
+    """Checkouts of one engine's pool and how long they waited for a connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.max_wait = 0.0
+        self._wait_times = deque(maxlen=STATS_WINDOW)
+
+    def record(self, waited: float, error: Optional[BaseException] = None):
+        with self._lock:
+            if isinstance(error, exc.TimeoutError):
+                self.timeouts += 1
+            elif error is not None:
+                self.failed += 1
+            else:
+                self.checkouts += 1
+            self.max_wait = max(self.max_wait, waited)
+            self._wait_times.append(waited)
+
+    def summary(self) -> Dict[str, Any]:
+        return PoolStats.merged_summary([self])
+
+    @staticmethod
+    def merged_summary(stats: List["PoolStats"]) -> Dict[str, Any]:
+        """Totals over several pools; the average wait covers their recent checkouts"""
+        checkouts = timeouts = failed = 0
+        max_wait, wait_times = 0.0, []
+        for item in stats:
+            with item._lock:
+                checkouts += item.checkouts
+                timeouts += item.timeouts
+                failed += item.failed
+                max_wait = max(max_wait, item.max_wait)
+                wait_times.extend(item._wait_times)
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "failed": failed,
+            "average_wait_seconds": round(sum(wait_times) / len(wait_times), 4) if wait_times else 0.0,
+            "max_wait_seconds": round(max_wait, 4),
+        }
+
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that times every checkout: the wait for a free slot plus any new connection"""
+
+    def __init__(self, *args, stats: Optional[PoolStats] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except BaseException as e:
+            self.stats.record(time.perf_counter() - started, e)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def credential_key(host: str, port: int, dbname: str, user: str, password: str) -> str:
+    """Registry key: a hash of the connection parameters, so no password is kept as a key"""
+    return hashlib.sha256("\0".join([host, str(port), dbname, user, password]).encode()).hexdigest()
+
+
+def build_engine(url: URL) -> Engine:
+    return create_engine(
+        url,
+        poolclass=MonitoredQueuePool,
+        pool_size=POSTGRES_POOL_SIZE,
+        max_overflow=POSTGRES_MAX_OVERFLOW,
+        pool_timeout=POSTGRES_POOL_TIMEOUT,
+        pool_recycle=POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=POSTGRES_POOL_PRE_PING
+    )
+
+
+class EngineRegistry:
+    """
+    Bounded LRU cache of SQLAlchemy engines keyed by credential_key. Requests for the same
+    database share one engine and its connection pool; the least recently used engine is
+    disposed (its idle connections closed) when the cache is full. A new engine is only
+    cached once it has connected, so bad connection parameters never evict working engines.
+    """
+
+    def __init__(self, max_engines: int = POSTGRES_ENGINE_CACHE_SIZE):
+        self.max_engines = max_engines
+        self._engines: "OrderedDict[str, Engine]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def get(self, host: str, port: int, dbname: str, user: str, password: str) -> Engine:
+        key = credential_key(host, port, dbname, user, password)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+                self.reused += 1
+                return engine
+
+        url = URL.create(
+            "postgresql+psycopg2", username=user, password=password, host=host, port=port, database=dbname
+        )
+        engine = build_engine(url)
+        # Connecting is network IO; the connection stays in the new pool for the caller
+        try:
+            engine.connect().close()
+        except Exception:
+            engine.dispose()
+            raise
+        return self._register(key, engine)
+
+    def _register(self, key: str, engine: Engine) -> Engine:
+        evicted = []
+        with self._lock:
+            existing = self._engines.get(key)
+            if existing is not None:
+                # Another request connected to the same database first; use its engine
+                self._engines.move_to_end(key)
+                self.reused += 1
+                evicted.append(engine)
+                engine = existing
+            else:
+                self._engines[key] = engine
+                self.created += 1
+            while len(self._engines) > max(self.max_engines, 1):
+                evicted.append(self._engines.popitem(last=False)[1])
+                self.evicted += 1
+        # Closing connections is network IO; don't hold the lock for it
+        for old in evicted:
+            print(f"[POSTGRES] Disposing engine for {old.url.render_as_string(hide_password=True)}")
+            old.dispose()
+        return engine
+
+    def dispose_all(self):
+        with self._lock:
+            engines, self._engines = list(self._engines.values()), OrderedDict()
+        for engine in engines:
+            engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Registry and pool totals. Engines belong to different users' databases, so nothing
+        identifying one (host, database, credential key) is included.
+        """
+        with self._lock:
+            pools = [engine.pool for engine in self._engines.values()]
+            summary = {
+                "max_engines": self.max_engines,
+                "engines": len(pools),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+            }
+        summary["pool_config"] = {
+            "pool_size": POSTGRES_POOL_SIZE,
+            "max_overflow": POSTGRES_MAX_OVERFLOW,
+            "pool_timeout": POSTGRES_POOL_TIMEOUT,
+            "pool_recycle": POSTGRES_POOL_RECYCLE,
+            "pre_ping": POSTGRES_POOL_PRE_PING,
+        }
+        summary["pools"] = {
+            "checked_out": sum(pool.checkedout() for pool in pools),
+            "idle": sum(pool.checkedin() for pool in pools),
+            "overflow": sum(max(pool.overflow(), 0) for pool in pools),
+            **PoolStats.merged_summary([pool.stats for pool in pools]),
+        }
+        return summary
+
+
+engine_registry = EngineRegistry()
 
 
 def create_postgres_engine(host: str, port: int, dbname: str, user: str, password: str) -> Engine:
-    url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}"
-    engine = create_engine(url)
-    return engine
+    """The pooled engine for these connection parameters, created on first use"""
+    return engine_registry.get(host, port, dbname, user, password)
+
+
+def postgres_pool_stats() -> Dict[str, Any]:
+    return engine_registry.stats()
+
+
+def dispose_postgres_engines():
+    engine_registry.dispose_all()
 
 
 def list_postgres_tables(engine: Engine) -> List[str]:
@@ -15,8 +230,81 @@ def list_postgres_tables(engine: Engine) -> List[str]:
     return inspector.get_table_names()
 
 
-def extract_table_data(engine: Engine, table_name: str, limit: int = 10000) -> pd.DataFrame:
-    # Limit to 10k rows by default for safety
-    query = f'SELECT * FROM "{table_name}" LIMIT {limit}'
-    df = pd.read_sql(query, engine)
-    return df 
\ No newline at end of file
+def _copy_select(engine: Engine, table: str, table_columns: Dict[str, Any], columns: List[str],
+                 limit: Optional[int]) -> str:
+    """SELECT of one table projected onto the combined columns (NULL where it has none)"""
+    quote = engine.dialect.identifier_preparer.quote
+    fields = []
+    for column in columns:
+        if column not in table_columns:
+            fields.append(f"NULL AS {quote(column)}")
+        elif isinstance(table_columns[column], Boolean):
+            # COPY writes booleans as t/f; true/false is what pandas reads as bool
+            fields.append(f"{quote(column)}::text AS {quote(column)}")
+        else:
+            fields.append(quote(column))
+    table_literal = "'" + table.replace("'", "''") + "'"
+    fields.append(f"{table_literal} AS {quote(TABLE_COLUMN)}")
+    query = f"SELECT {', '.join(fields)} FROM {quote(table)}"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    return query
+
+
+class CSVRecordCounter(io.TextIOBase):
+    """
+    Text file wrapper counting the CSV records written through it. Newlines inside quoted
+    fields don't end a record; the quoting state carries over between writes.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self._quoted = False
+        self.records = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: str) -> int:
+        parts = data.split('"')
+        # Every other part lies outside quotes; an escaped "" toggles twice
+        self.records += sum(part.count("\n") for part in parts[1 if self._quoted else 0::2])
+        self._quoted ^= len(parts) % 2 == 0
+        return self._f.write(data)
+
+
+def copy_tables_to_csv(engine: Engine, tables: List[str], file_path: str,
+                       limit: Optional[int] = POSTGRES_ROW_LIMIT) -> Dict[str, int]:
+    """
+    Stream tables into one CSV with `COPY (SELECT ...) TO STDOUT`: rows go from the
+    server to the file in small chunks and are never held in memory, whatever the limit.
+    Columns are the union of the tables' columns plus TABLE_COLUMN. Returns the rows
+    written per table. Raises NoSuchTableError for unknown tables.
+    """
+    inspector = inspect(engine)
+    table_columns = {
+        table: {column["name"]: column["type"] for column in inspector.get_columns(table)}
+        for table in tables
+    }
+    columns = list(dict.fromkeys(
+        name for columns_of in table_columns.values() for name in columns_of if name != TABLE_COLUMN
+    ))
+
+    rows = {}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(columns + [TABLE_COLUMN])
+            # rowcount isn't reliable after COPY TO STDOUT; count what reaches the file
+            counter = CSVRecordCounter(f)
+            for table in tables:
+                query = _copy_select(engine, table, table_columns[table], columns, limit)
+                written = counter.records
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", counter)
+                rows[table] = counter.records - written
+        cursor.close()
+        connection.rollback()
+    finally:
+        connection.close()
+    return rows
@@ -0,0 +1,71 @@
+import os
+import hashlib
+import pathlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from models.reportModel import Report
+
+# How long a completed report can be reused for identical input, in hours
+REPORT_CACHE_TTL_HOURS = float(os.getenv("REPORT_CACHE_TTL_HOURS", "168"))
+
+# Crew configuration that shapes the report; changing it invalidates the cache
+CONFIG_DIR = pathlib.Path(__file__).parent.parent / "config"
+CONFIG_FILES = [CONFIG_DIR / "agents.yaml", CONFIG_DIR / "tasks.yaml"]
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_hashes(file_path: str, prefix_lengths: Iterable[int] = ()) -> Dict[str, Any]:
+    """
+    One pass over the file: the content hash (dataset + crew configuration), the hash of
+    the dataset bytes alone, its size and the hashes of its first `prefix_lengths` bytes
+    """
+    data_digest = hashlib.sha256()
+    boundaries = sorted(set(prefix_lengths))
+    prefix_hashes = {}
+    position = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            # Snapshot the running hash at every prefix boundary inside this chunk
+            while boundaries and boundaries[0] <= position + len(chunk):
+                boundary = boundaries.pop(0)
+                snapshot = data_digest.copy()
+                snapshot.update(chunk[:boundary - position])
+                prefix_hashes[boundary] = snapshot.hexdigest()
+            data_digest.update(chunk)
+            position += len(chunk)
+
+    return {
+        "content_hash": content_hash_for(data_digest.hexdigest()),
+        "data_hash": data_digest.hexdigest(),
+        "data_bytes": position,
+        "prefix_hashes": prefix_hashes,
+    }
+
+
+def content_hash_for(data_hash: str) -> str:
+    """
+    The content hash of a dataset from its data hash and the current crew configuration.
+    Anything that stores data hashes can derive it again, so a config change still counts.
+    """
+    content_digest = hashlib.sha256(data_hash.encode())
+    for config_file in CONFIG_FILES:
+        content_digest.update(config_file.read_bytes())
+    return content_digest.hexdigest()
+
+
+def fingerprint_header(header: bytes) -> Optional[str]:
+    """Schema fingerprint: hash of the header row without its line ending"""
+    header = header.rstrip(b"\r\n")
+    return hashlib.sha256(header).hexdigest() if header else None
+
+
+async def find_cached_report(content_hash: str, user_id: str) -> Optional[Report]:
+    """
+    Return the user's most recent completed report for the same content hash within the TTL
+    """
+    if REPORT_CACHE_TTL_HOURS <= 0 or not user_id:
+        return None
+    since = datetime.utcnow() - timedelta(hours=REPORT_CACHE_TTL_HOURS)
+    return await Report.find_by_content_hash(content_hash, user_id, since)
@@ -1,10 +1,38 @@
 import os
 import uuid
+import asyncio
+import hashlib
 import pathlib
-from typing import Optional
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
+import aiofiles
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, ClientError
 
+from utils.report_cache import content_hash_for, fingerprint_header
+from utils.executors import run_io
+
+# Bytes read from an upload and written to disk at a time
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Longest header row kept for the schema fingerprint
+MAX_HEADER_BYTES = 64 * 1024
+
+# S3 uploader configuration (S3_ENDPOINT_URL points at a local stand-in such as moto_server)
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20"))
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "5"))
+S3_RETRY_MODE = os.getenv("S3_RETRY_MODE", "adaptive")
+S3_MULTIPART_THRESHOLD = int(float(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16")) * 1024 * 1024)
+S3_MULTIPART_CHUNK_SIZE = int(float(os.getenv("S3_MULTIPART_CHUNK_MB", "8")) * 1024 * 1024)
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "4"))
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+# Running background backups, referenced so they aren't garbage collected mid-upload
+_backup_tasks = set()
+
 def create_sheet_dump_directory():
     """
     Create sheet_dump directory if it doesn't exist
@@ -13,76 +41,171 @@ def create_sheet_dump_directory():
     sheet_dump_dir.mkdir(exist_ok=True)
     return sheet_dump_dir
 
-async def upload_csv_to_local(file_buffer: bytes, original_name: str) -> str:
+async def stream_to_sheet_dump(chunks: AsyncIterator[bytes], suffix: str = ".csv") -> Dict[str, Any]:
+    """
+    Write a stream of byte chunks to a new file in sheet_dump, hashing it and counting
+    bytes and rows in the same pass. Memory use is one chunk. Returns the file path,
+    hashes (as in report_cache.compute_file_hashes), byte size and the number of lines
+    after the header as `record_count`. That is an estimate: quoted cells can span lines,
+    so the analysis replaces it with the parsed row count. A failed stream leaves no file behind.
+    """
+    sheet_dump_dir = create_sheet_dump_directory()
+    file_path = sheet_dump_dir / f"{uuid.uuid4()}{suffix}"
+
+    digest = hashlib.sha256()
+    size = 0
+    newlines = 0
+    header = b""
+    last_byte = b""
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                digest.update(chunk)
+                size += len(chunk)
+                newlines += chunk.count(b"\n")
+                if not header.endswith(b"\n") and len(header) < MAX_HEADER_BYTES:
+                    header += chunk[:MAX_HEADER_BYTES]
+                    if b"\n" in header:
+                        header = header[:header.index(b"\n") + 1]
+                last_byte = chunk[-1:]
+                await f.write(chunk)
+    except BaseException:
+        if file_path.exists():
+            file_path.unlink()
+        raise
+
+    # A last row without a trailing newline is still a row
+    lines = newlines + (1 if size and last_byte != b"\n" else 0)
+    print(f"File streamed locally: {file_path} ({size} bytes)")
+    return {
+        "file_path": str(file_path),
+        "data_bytes": size,
+        "data_hash": digest.hexdigest(),
+        "content_hash": content_hash_for(digest.hexdigest()),
+        "schema_fingerprint": fingerprint_header(header),
+        "record_count": max(0, lines - 1),
+    }
+
+async def _read_chunks(upload) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+async def stream_upload_to_local(upload, original_name: str) -> Dict[str, Any]:
     """
-    Upload CSV file to local directory
+    Stream an upload (anything with an async read(size)) to sheet_dump in fixed-size chunks;
+    see stream_to_sheet_dump for the result
     """
     try:
-        # Create sheet_dump directory
-        sheet_dump_dir = create_sheet_dump_directory()
-        
-        # Generate unique filename
-        file_ext = pathlib.Path(original_name).suffix
-        file_name = f"{uuid.uuid4()}{file_ext}"
-        file_path = sheet_dump_dir / file_name
-        
-        # Write file to local directory
-        with open(file_path, 'wb') as f:
-            f.write(file_buffer)
-        
-        print(f"File saved locally: {file_path}")
-        return str(file_path)
-        
+        return await stream_to_sheet_dump(_read_chunks(upload), pathlib.Path(original_name).suffix)
     except Exception as e:
         print(f"Local file save error: {e}")
         raise Exception("Failed to save file locally")
 
-async def upload_csv_to_s3(file_buffer: bytes, original_name: str) -> Optional[str]:
+def get_s3_settings() -> Optional[Dict[str, str]]:
+    """Bucket, region and credentials, or None when S3 isn't configured"""
+    settings = {
+        "access_key": os.getenv("AWS_ACCESS_KEY_ID"),
+        "secret_key": os.getenv("AWS_SECRET_ACCESS_KEY"),
+        "region": os.getenv("AWS_REGION", "us-east-1"),
+        "bucket": os.getenv("AWS_BUCKET_NAME"),
+    }
+    if not all([settings["access_key"], settings["secret_key"], settings["bucket"]]):
+        return None
+    return settings
+
+def get_s3_client():
     """
-    Upload CSV file to S3 (if AWS credentials are configured)
+    Shared S3 client, created on first use. boto3 clients are thread-safe; the pool
+    keeps connections alive across uploads and retries back off per S3_RETRY_MODE.
     """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                settings = get_s3_settings() or {}
+                _s3_client = boto3.client(
+                    's3',
+                    aws_access_key_id=settings.get("access_key"),
+                    aws_secret_access_key=settings.get("secret_key"),
+                    region_name=settings.get("region"),
+                    endpoint_url=S3_ENDPOINT_URL,
+                    config=Config(
+                        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                        retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": S3_RETRY_MODE}
+                    )
+                )
+    return _s3_client
+
+def reset_s3_client():
+    """Drop the shared client, e.g. after changing credentials or inside a moto mock_aws() block"""
+    global _s3_client
+    with _s3_client_lock:
+        _s3_client = None
+
+def _transfer_config() -> TransferConfig:
+    # Parallel multipart above the threshold; max_concurrency parts in flight per upload
+    return TransferConfig(
+        multipart_threshold=S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+        max_concurrency=S3_MAX_CONCURRENCY,
+        use_threads=True
+    )
+
+def _s3_url(bucket: str, region: str, key: str) -> str:
+    if S3_ENDPOINT_URL:
+        return f"{S3_ENDPOINT_URL.rstrip('/')}/{bucket}/{key}"
+    return f"https://{bucket}.s3.{region}.amazonaws.com/{key}"
+
+def _s3_key(original_name: str) -> str:
+    file_ext = pathlib.Path(original_name).suffix
+    return f"uploads/csv/{uuid.uuid4()}{file_ext}"
+
+async def upload_file_to_s3(file_path: str, key: Optional[str] = None, content_type: str = "text/csv") -> Optional[str]:
+    """
+    Upload a file from disk to S3 without blocking the event loop; large files go up as
+    parallel multipart uploads. Returns the object URL, or None if S3 isn't configured
+    or the upload failed.
+    """
+    settings = get_s3_settings()
+    if settings is None:
+        print("AWS credentials not configured, skipping S3 upload")
+        return None
+    key = key or _s3_key(file_path)
     try:
-        # Check if AWS credentials are available
-        aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-        aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-        aws_region = os.getenv("AWS_REGION", "us-east-1")
-        aws_bucket = os.getenv("AWS_BUCKET_NAME")
-        
-        if not all([aws_access_key, aws_secret_key, aws_bucket]):
-            print("AWS credentials not configured, skipping S3 upload")
-            return None
-        
-        # Initialize S3 client
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-            region_name=aws_region
+        await run_io(
+            get_s3_client().upload_file,
+            file_path,
+            settings["bucket"],
+            key,
+            ExtraArgs={"ContentType": content_type},
+            Config=_transfer_config()
         )
-        
-        # Generate unique filename
-        file_ext = pathlib.Path(original_name).suffix
-        file_name = f"uploads/csv/{uuid.uuid4()}{file_ext}"
-        
-        # Upload to S3
-        s3_client.put_object(
-            Bucket=aws_bucket,
-            Key=file_name,
-            Body=file_buffer,
-            ContentType="text/csv"
-        )
-        
-        # Return S3 URL
-        s3_url = f"https://{aws_bucket}.s3.{aws_region}.amazonaws.com/{file_name}"
-        print(f"File uploaded to S3: {s3_url}")
-        return s3_url
-        
     except NoCredentialsError:
         print("AWS credentials not found")
         return None
-    except ClientError as e:
+    except (ClientError, boto3.exceptions.S3UploadFailedError) as e:
         print(f"S3 upload error: {e}")
         return None
     except Exception as e:
         print(f"Unexpected error during S3 upload: {e}")
-        return None 
\ No newline at end of file
+        return None
+    s3_url = _s3_url(settings["bucket"], settings["region"], key)
+    print(f"File uploaded to S3: {s3_url}")
+    return s3_url
+
+def backup_upload_to_s3(file_path: str, original_name: str) -> Optional[asyncio.Task]:
+    """
+    Copy an ingested upload to S3 in the background when S3 is configured; the analysis
+    doesn't wait for it. Returns the upload task, or None when S3 isn't configured.
+    """
+    if get_s3_settings() is None:
+        return None
+    task = asyncio.create_task(upload_file_to_s3(file_path, _s3_key(original_name)))
+    _backup_tasks.add(task)
+    task.add_done_callback(_backup_tasks.discard)
+    return task
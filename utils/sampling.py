@@ -0,0 +1,133 @@
+import os
+import csv
+import random
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_store import has_parquet, read_rows
+
+# Budget for the data the agents read; aggregate statistics still use the full file
+SAMPLE_MAX_ROWS = int(os.getenv("SAMPLE_MAX_ROWS", "2000"))
+SAMPLE_MAX_BYTES = int(os.getenv("SAMPLE_MAX_BYTES", str(256 * 1024)))
+# The reservoir keeps this many times the row budget so stratification has room to work
+SAMPLE_OVERSAMPLE = 5
+# Columns with at most this many distinct values can be used as strata
+SAMPLE_MAX_STRATA_VALUES = 20
+SAMPLE_SEED = 42
+
+
+def reservoir_sample_csv(file_path: str, k: int, seed: int = SAMPLE_SEED) -> pd.DataFrame:
+    """
+    Uniformly sample k rows from a CSV in one streaming pass (Algorithm R).
+    Sampled rows keep their original order. Like the pandas readers, blank lines are
+    skipped and short rows padded with nulls; rows with too many fields are skipped.
+    """
+    rng = random.Random(seed)
+    reservoir: List[tuple] = []
+    with open(file_path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        index = -1
+        for row in reader:
+            if not row or len(row) > width:
+                continue
+            if len(row) < width:
+                row = row + [None] * (width - len(row))
+            index += 1
+            if index < k:
+                reservoir.append((index, row))
+            else:
+                slot = rng.randint(0, index)
+                if slot < k:
+                    reservoir[slot] = (index, row)
+    reservoir.sort(key=lambda item: item[0])
+    return pd.DataFrame([row for _, row in reservoir], columns=header)
+
+
+def uniform_sample_parquet(file_path: str, row_count: int, k: int, seed: int = SAMPLE_SEED) -> pd.DataFrame:
+    """
+    Uniformly sample k rows by position from the dataset's Parquet copy (memory-mapped),
+    without scanning the CSV text. Sampled rows keep their original order.
+    """
+    rng = random.Random(seed)
+    indices = sorted(rng.sample(range(row_count), min(k, row_count)))
+    return read_rows(file_path, indices)
+
+
+def choose_strata_columns(profile: Optional[Dict[str, Any]], limit: int = 2) -> List[str]:
+    """Low-cardinality categorical columns (e.g. STATUS, PRODUCTLINE, priority)"""
+    if not profile:
+        return []
+    return [
+        name for name, info in profile["columns"].items()
+        if info["kind"] == "categorical" and 2 <= (info["unique_count"] or 0) <= SAMPLE_MAX_STRATA_VALUES
+    ][:limit]
+
+
+def stratified_sample(df: pd.DataFrame, strata: List[str], n: int, seed: int = SAMPLE_SEED) -> pd.DataFrame:
+    """
+    Sample n rows with proportional allocation per stratum, keeping at least one row
+    of every stratum so rare categories stay visible to the agents. The total is exactly
+    n: with more strata than n, one row each of the n largest strata is kept.
+    """
+    if len(df) <= n:
+        return df
+    if not strata:
+        return df.sample(n=n, random_state=seed).sort_index()
+
+    shuffled = df.sample(frac=1, random_state=seed)
+    keys = shuffled[strata].astype(str).agg("|".join, axis=1)
+    counts = keys.value_counts()
+    if len(counts) >= n:
+        quota = pd.Series(1, index=counts.index[:n])
+    else:
+        # One row per stratum, the rest split proportionally (largest remainders round up)
+        extra = counts - 1
+        share = extra * (n - len(counts)) / extra.sum()
+        quota = np.floor(share)
+        leftover = int(n - len(counts) - quota.sum())
+        quota[(share - quota).sort_values(ascending=False).index[:leftover]] += 1
+        quota += 1
+    rank = shuffled.groupby(keys).cumcount()
+    return shuffled[rank < keys.map(quota).fillna(0)].sort_index()
+
+
+def create_llm_sample(file_path: str, profile: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Write a bounded, stratified sample of a CSV next to it for the agents to read.
+    Returns None when the file already fits the row and byte budget.
+    """
+    file_size = os.path.getsize(file_path)
+    row_count = profile["row_count"] if profile else None
+    if file_size <= SAMPLE_MAX_BYTES and row_count is not None and row_count <= SAMPLE_MAX_ROWS:
+        return None
+
+    if row_count is not None and has_parquet(file_path):
+        reservoir = uniform_sample_parquet(file_path, row_count, SAMPLE_MAX_ROWS * SAMPLE_OVERSAMPLE)
+    else:
+        reservoir = reservoir_sample_csv(file_path, SAMPLE_MAX_ROWS * SAMPLE_OVERSAMPLE)
+    if reservoir.empty:
+        return None
+
+    # Fit the byte budget using the average row size of the reservoir
+    average_row_bytes = max(1, len(reservoir.to_csv(index=False).encode("utf-8")) / len(reservoir))
+    target_rows = max(1, min(SAMPLE_MAX_ROWS, int(SAMPLE_MAX_BYTES / average_row_bytes)))
+
+    strata = choose_strata_columns(profile)
+    sample = stratified_sample(reservoir, strata, target_rows)
+
+    sample_path = f"{os.path.splitext(file_path)[0]}.sample.csv"
+    sample.to_csv(sample_path, index=False)
+    print(f"[SAMPLE] Sampled {len(sample)} rows of {row_count or 'unknown'} into {sample_path}")
+
+    return {
+        "file_path": sample_path,
+        "rows": len(sample),
+        "source_rows": row_count,
+        "bytes": os.path.getsize(sample_path),
+        "method": "stratified" if strata else "reservoir",
+        "strata": strata,
+    }
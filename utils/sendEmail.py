@@ -4,6 +4,17 @@ from email.mime.multipart import MIMEMultipart
 import os
 from typing import Dict, Any
 
+from utils.executors import run_io
+
+def _deliver(smtp_host: str, smtp_port: int, smtp_user: str, smtp_pass: str, recipient: str, text: str):
+    """
+    Blocking SMTP session: connect, upgrade to TLS, log in and send
+    """
+    with smtplib.SMTP(host=smtp_host, port=smtp_port) as server:
+        server.starttls()
+        server.login(smtp_user, smtp_pass)
+        server.sendmail(smtp_user, recipient, text)
+
 async def send_email(options: Dict[str, Any]):
     """
     Send email using SMTP
@@ -27,21 +38,9 @@ async def send_email(options: Dict[str, Any]):
         # Add body to email
         msg.attach(MIMEText(options['message'], 'plain'))
         
-        # Create SMTP session
-        server = smtplib.SMTP(host=smtp_host, port=smtp_port)
-        
-        # Start TLS for security
-        server.starttls()
-        
-        # Login to the server
-        server.login(smtp_user, smtp_pass)
-        
-        # Send email
+        # Send over SMTP in the IO pool so a slow mail server doesn't stall the event loop
         text = msg.as_string()
-        server.sendmail(smtp_user, options['email'], text)
-        
-        # Close the connection
-        server.quit()
+        await run_io(_deliver, smtp_host, smtp_port, smtp_user, smtp_pass, options['email'], text)
         
         return True
         
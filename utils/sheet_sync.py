@@ -0,0 +1,190 @@
+import os
+import time
+import random
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from models.reportModel import Report
+from models.scheduleModel import SheetSchedule
+from utils.crew_jobs import is_running
+from utils.dump_store import dump_manager
+from utils.executors import run_io
+from utils.google_sheets import parse_sheet_url, fetch_sheet
+
+# How often the scheduler looks for due schedules (0 disables it)
+SHEET_SYNC_POLL_SECONDS = float(os.getenv("SHEET_SYNC_POLL_SECONDS", "60"))
+# Sheets checked at the same time, across all users
+SHEET_SYNC_MAX_CONCURRENCY = int(os.getenv("SHEET_SYNC_MAX_CONCURRENCY", "2"))
+# Each next check moves by up to this share of the interval, so schedules created together drift apart
+SHEET_SYNC_JITTER = float(os.getenv("SHEET_SYNC_JITTER", "0.1"))
+SHEET_SYNC_MIN_INTERVAL_MINUTES = float(os.getenv("SHEET_SYNC_MIN_INTERVAL_MINUTES", "5"))
+# A claimed check that never finishes (crashed instance) is retried after this long
+SHEET_SYNC_LEASE_MINUTES = float(os.getenv("SHEET_SYNC_LEASE_MINUTES", "30"))
+# Failing sheets back off up to this multiple of their interval
+SHEET_SYNC_MAX_BACKOFF = int(os.getenv("SHEET_SYNC_MAX_BACKOFF", "8"))
+
+
+def next_run_after(interval_minutes: float, now: datetime, failures: int = 0) -> datetime:
+    """When a schedule is checked next: its interval (backed off after failures) with jitter"""
+    interval = interval_minutes * 60 * min(2 ** failures, SHEET_SYNC_MAX_BACKOFF)
+    jitter = random.uniform(-SHEET_SYNC_JITTER, SHEET_SYNC_JITTER) * interval
+    return now + timedelta(seconds=max(interval + jitter, 1))
+
+
+class SheetSyncScheduler:
+    """
+    Background polling of scheduled Google Sheets. Every poll claims the due schedules
+    (at most SHEET_SYNC_MAX_CONCURRENCY checks run at once), re-fetches each sheet and
+    starts an analysis only when the data hash differs from the last analysed one.
+    The fetch revalidates with ETag/Last-Modified, so an unchanged sheet usually costs
+    a 304 and no download.
+    """
+
+    def __init__(self, poll_seconds: float = SHEET_SYNC_POLL_SECONDS,
+                 max_concurrency: int = SHEET_SYNC_MAX_CONCURRENCY):
+        self.poll_seconds = poll_seconds
+        self.max_concurrency = max_concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self.results = defaultdict(int)
+        self.polls = 0
+        self.last_poll: Optional[str] = None
+
+    async def poll(self) -> int:
+        """Start checks for due schedules, up to the free capacity. Returns the number started."""
+        free = self.max_concurrency - len(self._running)
+        self.polls += 1
+        self.last_poll = datetime.utcnow().isoformat()
+        if free <= 0:
+            return 0
+        now = datetime.utcnow()
+        started = 0
+        for schedule in await SheetSchedule.find_due(now, free, exclude=list(self._running)):
+            if not await schedule.claim(now + timedelta(minutes=SHEET_SYNC_LEASE_MINUTES)):
+                continue
+            task = asyncio.create_task(self.check(schedule))
+            self._running[schedule.id] = task
+            task.add_done_callback(lambda _, schedule_id=schedule.id: self._running.pop(schedule_id, None))
+            started += 1
+        return started
+
+    async def check(self, schedule: SheetSchedule) -> str:
+        """
+        Fetch one scheduled sheet and analyse it if it changed. Returns the outcome:
+        changed, unchanged, retried (same data, but its last analysis did not complete),
+        deferred (crew queue full) or failed.
+        """
+        from routes.userRoutes import analyze_google_sheet
+
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        sheet = None
+        try:
+            file_id, gid = parse_sheet_url(schedule.sheet_url)
+            sheet = await fetch_sheet(file_id, gid)
+            same_data = sheet["data_hash"] == schedule.last_data_hash
+            if same_data and await self._analysed(schedule):
+                # The last report still holds this content; its blob stays for the next 304
+                await run_io(dump_manager.release, sheet["file_path"], keep_blobs=True)
+                outcome = "unchanged"
+                await schedule.update(
+                    last_status=outcome, last_error=None, last_checked_at=now, consecutive_failures=0,
+                    checks=schedule.checks + 1, next_run_at=next_run_after(schedule.interval_minutes, now)
+                )
+            else:
+                report, cached, _ = await analyze_google_sheet(sheet, file_id, schedule.user_id)
+                outcome = "retried" if same_data else "changed"
+                await schedule.update(
+                    last_status=outcome, last_error=None, last_checked_at=now,
+                    last_changed_at=schedule.last_changed_at if same_data else now,
+                    last_data_hash=sheet["data_hash"], last_report_id=report.id, consecutive_failures=0,
+                    checks=schedule.checks + 1, analyses=schedule.analyses + (0 if cached else 1),
+                    next_run_at=next_run_after(schedule.interval_minutes, now)
+                )
+                print(f"[SHEET-SYNC] {schedule.sheet_url} {outcome}, report {report.id} (cached: {cached})")
+        except HTTPException as e:
+            await run_io(dump_manager.release, sheet["file_path"], keep_blobs=True)
+            if e.status_code != 429:
+                return await self._failed(schedule, now, str(e.detail))
+            # The crew is saturated: try again once it has drained, without counting a failure
+            retry_after = int((e.headers or {}).get("Retry-After", 60))
+            outcome = "deferred"
+            await schedule.update(
+                last_status=outcome, last_checked_at=now, checks=schedule.checks + 1,
+                next_run_at=now + timedelta(seconds=retry_after)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if sheet:
+                await run_io(dump_manager.release, sheet["file_path"], keep_blobs=True)
+            return await self._failed(schedule, now, str(e))
+        self.results[outcome] += 1
+        print(f"[SHEET-SYNC] Checked {schedule.sheet_url}: {outcome} ({time.perf_counter() - started:.2f}s)")
+        return outcome
+
+    async def _analysed(self, schedule: SheetSchedule) -> bool:
+        """
+        Whether the report started for the last data hash completed, or is still running
+        here. A failed, cancelled or lost analysis is started again for the same data.
+        """
+        report = await Report.find_by_id(schedule.last_report_id) if schedule.last_report_id else None
+        if report is None:
+            return False
+        return report.status == "completed" or (report.status == "processing" and is_running(report.id))
+
+    async def _failed(self, schedule: SheetSchedule, now: datetime, error: str) -> str:
+        failures = schedule.consecutive_failures + 1
+        await schedule.update(
+            last_status="failed", last_error=error, last_checked_at=now, consecutive_failures=failures,
+            checks=schedule.checks + 1, next_run_at=next_run_after(schedule.interval_minutes, now, failures)
+        )
+        self.results["failed"] += 1
+        print(f"[SHEET-SYNC] Checking {schedule.sheet_url} failed ({failures} in a row): {error}")
+        return "failed"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.poll_seconds > 0,
+            "poll_seconds": self.poll_seconds,
+            "max_concurrency": self.max_concurrency,
+            "running": len(self._running),
+            "polls": self.polls,
+            "last_poll": self.last_poll,
+            "results": dict(self.results),
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[SHEET-SYNC] Poll failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        """Start the background scheduler (a no-op if it is disabled or already running)"""
+        if self.poll_seconds <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        print(f"[SHEET-SYNC] Polling schedules every {self.poll_seconds:.0f}s")
+
+    async def stop(self):
+        tasks = [task for task in [self._task, *self._running.values()] if task]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+sheet_sync = SheetSyncScheduler()